@@ -0,0 +1,169 @@
+"""
+Benchmark of the phase-based solver across board sizes
+
+For every size, seeded random boards are solved phase by phase, the same
+way solve_puzzle does it:
+    solve_lower_rows - zero to the corner, then interior/col0 tiles (phase one)
+    solve_top_rows   - row1/row0 tiles (phase two)
+    solve_endgame    - the final 2x3 block by table lookup (phase three),
+                       or solve_2x2 after the macros with --no-endgame
+Each board is solved twice from the same start: once for wall time, and
+once under tracemalloc for allocated bytes, so tracing never skews timings.
+Results are written as JSON so runs can be compared.
+
+Usage: python benchmarks/bench_phases.py [--sizes 3 4 ... 50] [--boards N]
+                                          [--seed S] [--checked] [--no-endgame]
+                                          [--output PATH]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fifteen_solver.endgame import endgame_table
+from fifteen_solver.puzzle import Puzzle
+from fifteen_solver.scramble import random_grids
+
+PHASES = ("solve_lower_rows", "solve_top_rows", "solve_endgame")
+DEFAULT_SIZES = (3, 4, 5, 8, 10, 15, 20, 30, 40, 50)
+
+def phase_calls(puzzle, endgame):
+    """
+    The phase methods solve_puzzle would run on this puzzle, bound to their
+    arguments; 2x2 boards have no endgame block and finish with solve_2x2
+    Returns a list of (phase name, callable) pairs
+    """
+    stop_row, block = puzzle.phase_plan(endgame)
+    if block is None:
+        return [("solve_lower_rows", puzzle.solve_lower_rows),
+                ("solve_top_rows", puzzle.solve_top_rows),
+                ("solve_endgame", puzzle.solve_2x2)]
+    block_height, block_width = block
+    return [("solve_lower_rows", lambda: puzzle.solve_lower_rows(stop_row)),
+            ("solve_top_rows", lambda: puzzle.solve_top_rows(block_width - 1)),
+            ("solve_endgame", lambda: puzzle.solve_endgame(block_height, block_width))]
+
+def time_phases(grid, checked, endgame):
+    """
+    Wall time and moves emitted by each phase for one board
+    Returns a dictionary keyed by phase name
+    """
+    puzzle = Puzzle(len(grid), len(grid[0]), grid, checked)
+    results = {}
+    for phase, call in phase_calls(puzzle, endgame):
+        start = time.perf_counter()
+        soln_string = call()
+        results[phase] = {"seconds": time.perf_counter() - start,
+                          "moves": len(soln_string)}
+    assert puzzle.row0_invariant(0), "Benchmark board left unsolved"
+    return results
+
+def trace_phases(grid, checked, endgame):
+    """
+    Bytes allocated (net and peak) by each phase for one board
+    Returns a dictionary keyed by phase name
+    """
+    puzzle = Puzzle(len(grid), len(grid[0]), grid, checked)
+    results = {}
+    tracemalloc.start()
+    try:
+        for phase, call in phase_calls(puzzle, endgame):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            soln_string = call()
+            current, peak = tracemalloc.get_traced_memory()
+            results[phase] = {"net_bytes": current - before,
+                              "peak_bytes": peak - before}
+            del soln_string
+    finally:
+        tracemalloc.stop()
+    return results
+
+def _summary(values):
+    """
+    Mean, median, min and max of a list of numbers
+    Returns a dictionary
+    """
+    return {"mean": statistics.fmean(values),
+            "median": statistics.median(values),
+            "min": min(values),
+            "max": max(values)}
+
+def bench_size(size, boards, seed, checked, endgame):
+    """
+    Benchmark one square board size
+    Returns a dictionary of per-phase summaries
+    """
+    timings = {phase: [] for phase in PHASES}
+    moves = {phase: [] for phase in PHASES}
+    net_bytes = {phase: [] for phase in PHASES}
+    peak_bytes = {phase: [] for phase in PHASES}
+    totals = []
+    #Build the endgame table up front, so the first board's timing does not include it
+    block = Puzzle(size, size).endgame_block()
+    if endgame and block is not None:
+        endgame_table(*block)
+    for grid in random_grids(size, size, boards, seed):
+        timed = time_phases(grid, checked, endgame)
+        traced = trace_phases(grid, checked, endgame)
+        for phase in PHASES:
+            timings[phase].append(timed[phase]["seconds"])
+            moves[phase].append(timed[phase]["moves"])
+            net_bytes[phase].append(traced[phase]["net_bytes"])
+            peak_bytes[phase].append(traced[phase]["peak_bytes"])
+        totals.append(sum(timed[phase]["moves"] for phase in PHASES))
+    return {"height": size,
+            "width": size,
+            "boards": boards,
+            "seconds": {phase: _summary(timings[phase]) for phase in PHASES},
+            "moves": {phase: _summary(moves[phase]) for phase in PHASES},
+            "total_moves": _summary(totals),
+            "net_bytes": {phase: _summary(net_bytes[phase]) for phase in PHASES},
+            "peak_bytes": {phase: _summary(peak_bytes[phase]) for phase in PHASES}}
+
+def main(argv=None):
+    """
+    Parse arguments, run every size and write the JSON report
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--boards", type=int, default=5, help="boards per size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checked", action="store_true", help="solve in checked mode")
+    parser.add_argument("--no-endgame", dest="endgame", action="store_false",
+                        help="finish with the row0/row1 and 2x2 macros")
+    parser.add_argument("--output", help="JSON file to write (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = {"python": platform.python_version(),
+              "platform": platform.platform(),
+              "seed": args.seed,
+              "checked": args.checked,
+              "endgame": args.endgame,
+              "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+              "results": []}
+    for size in args.sizes:
+        report["results"].append(bench_size(size, args.boards, args.seed, args.checked,
+                                            args.endgame))
+        print("%dx%d done" % (size, size), file=sys.stderr)
+    #ru_maxrss is kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    report["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as stream:
+            stream.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+Headless solver for Loyd's Fifteen puzzle
+Importing this package never loads the CodeSkulptor GUI
+"""
+
+from fifteen_solver.puzzle import Puzzle
+
+__all__ = ["Puzzle"]
@@ -0,0 +1,234 @@
+"""
+Anytime search for mid-sized boards (5x5 to 8x8)
+Sits between the fast but long phase-based solve_puzzle and the optimal
+solvers: it trades a node or time budget for shorter move strings.
+
+Two strategies share the same budget and pruning:
+    weighted A*  - expands by g + weight * h; after the first solution it
+                   keeps going, pruning anything that cannot beat the best
+                   solution so far (Anytime Weighted A*)
+    beam search  - keeps the beam_width most promising boards per depth,
+                   doubling the width after each pass while budget remains
+Either way the best solution found when the budget runs out is returned.
+solve_anytime first solves a copy of the board with solve_puzzle and
+hands that solution to the search as the one to beat, so the pruning
+bounds both strategies from the start and the answer is never longer.
+"""
+
+import heapq
+import time
+from itertools import count
+
+from fifteen_solver.heuristics import ManhattanLinearConflict
+from fifteen_solver.optimal import neighbour_table
+from fifteen_solver.scramble import is_solvable
+
+#Default inflation of the heuristic for weighted A*
+DEFAULT_WEIGHT = 3.0
+#Default number of boards expanded before giving up
+DEFAULT_NODES = 200000
+#Nodes between deadline checks, minus one
+DEADLINE_MASK = 1023
+
+class AnytimeSearch:
+    """
+    Budgeted weighted A* or beam search over flat tile lists
+    The heuristic must be admissible for the pruning to be safe
+    """
+
+    def __init__(self, puzzle_height, puzzle_width, heuristic=None,
+                 weight=DEFAULT_WEIGHT, beam_width=None):
+        """
+        Set up move tables and the heuristic for the given board size;
+        with a beam_width, beam search is used instead of weighted A*
+        Returns an AnytimeSearch object
+        """
+        assert puzzle_height * puzzle_width <= 1 << 8, "Anytime search is limited to 256 cells"
+        self._height = puzzle_height
+        self._width = puzzle_width
+        self._neighbours = neighbour_table(puzzle_height, puzzle_width)
+        if heuristic is None:
+            heuristic = ManhattanLinearConflict(puzzle_height, puzzle_width)
+        self._heuristic = heuristic
+        self._weight = weight
+        self._beam_width = beam_width
+        self._nodes = 0
+        self._solutions = 0
+
+    def get_nodes(self):
+        """
+        Getter for the number of boards expanded by the last solve
+        Returns an integer
+        """
+        return self._nodes
+
+    def get_solutions(self):
+        """
+        Getter for the number of improving solutions found by the last solve
+        Returns an integer
+        """
+        return self._solutions
+
+    def _children(self, key, zero, value):
+        """
+        Boards one move away from a packed board
+        Yields (direction, child key, child blank index, child estimate) tuples
+        """
+        tiles = bytearray(key)
+        update = self._heuristic.update
+        for direction, other in self._neighbours[zero]:
+            tile = tiles[other]
+            tiles[zero] = tile
+            tiles[other] = 0
+            child_value = update(tiles, value, tile, other, zero)
+            yield direction, bytes(tiles), other, child_value
+            tiles[other] = tile
+            tiles[zero] = 0
+
+    def solve_tiles(self, tiles, max_nodes=DEFAULT_NODES, deadline=None, best=None):
+        """
+        Search for a short move string for a flat row-major tile list,
+        stopping after max_nodes expansions or at the deadline (a
+        time.monotonic() value), whichever comes first
+        best is a known solution (such as solve_puzzle's) that only
+        strictly shorter ones replace
+        Returns the best move string found, or None
+        """
+        tiles = list(tiles)
+        if not is_solvable(tiles, self._width):
+            raise ValueError("Puzzle is not solvable")
+        self._nodes = 0
+        self._solutions = 0
+        if self._beam_width is None:
+            return self._weighted(tiles, max_nodes, deadline, best)
+        return self._beam(tiles, max_nodes, deadline, best)
+
+    def _spent(self, max_nodes, deadline):
+        """
+        Count one expansion against the budget
+        Returns True once the budget is used up
+        """
+        self._nodes += 1
+        if max_nodes is not None and self._nodes > max_nodes:
+            return True
+        #Checking the clock every node would dominate the search
+        return (deadline is not None and self._nodes & DEADLINE_MASK == 0
+                and time.monotonic() > deadline)
+
+    @staticmethod
+    def _path(parents, key):
+        """
+        Follow parent links back from a board to the start
+        Returns a move string
+        """
+        path = []
+        while True:
+            parent, direction = parents[key]
+            if parent is None:
+                return "".join(reversed(path))
+            path.append(direction)
+            key = parent
+
+    def _weighted(self, tiles, max_nodes, deadline, best):
+        """
+        Anytime Weighted A*, improving on best (None for no solution yet)
+        Returns the best move string found, or None
+        """
+        weight = self._weight
+        goal = bytes(range(len(tiles)))
+        start = bytes(tiles)
+        value = self._heuristic.initial(tiles)
+        depths = {start: 0}
+        parents = {start: (None, None)}
+        tiebreak = count()
+        frontier = [(weight * value, next(tiebreak), 0, value, start, tiles.index(0))]
+        while frontier:
+            dummy_priority, dummy_tie, cost, value, key, zero = heapq.heappop(frontier)
+            if cost > depths[key]:
+                continue
+            #Anything that cannot beat the best solution so far is dropped
+            if best is not None and cost + value >= len(best):
+                continue
+            if key == goal:
+                best = self._path(parents, key)
+                self._solutions += 1
+                continue
+            if self._spent(max_nodes, deadline):
+                break
+            for direction, child, other, child_value in self._children(key, zero, value):
+                child_cost = cost + 1
+                if depths.get(child, child_cost + 1) <= child_cost:
+                    continue
+                depths[child] = child_cost
+                parents[child] = (key, direction)
+                heapq.heappush(frontier, (child_cost + weight * child_value, next(tiebreak),
+                                          child_cost, child_value, child, other))
+        return best
+
+    def _beam(self, tiles, max_nodes, deadline, best):
+        """
+        Beam search, doubling the beam width after every pass, improving
+        on best (None for no solution yet); without one a pass is only
+        bounded by the beam width
+        Returns the best move string found, or None
+        """
+        goal = bytes(range(len(tiles)))
+        start = bytes(tiles)
+        start_layer = [(self._heuristic.initial(tiles), start, tiles.index(0))]
+        beam_width = self._beam_width
+        while True:
+            parents = {start: (None, None)}
+            layer = start_layer
+            cost = 0
+            truncated = False
+            while layer:
+                following = []
+                for value, key, zero in layer:
+                    if key == goal:
+                        #Every board in a layer has the same depth, so this
+                        #is the shortest solution this pass can find
+                        if best is None or cost < len(best):
+                            best = self._path(parents, key)
+                            self._solutions += 1
+                        following = []
+                        break
+                    if self._spent(max_nodes, deadline):
+                        return best
+                    for direction, child, other, child_value in self._children(key, zero, value):
+                        #Boards seen at a shallower depth, or hopeless ones, are skipped
+                        if child in parents:
+                            continue
+                        if best is not None and cost + 1 + child_value >= len(best):
+                            continue
+                        parents[child] = (key, direction)
+                        following.append((child_value, child, other))
+                cost += 1
+                #Same depth throughout the layer, so h alone ranks the boards
+                if len(following) > beam_width:
+                    following.sort(key=lambda entry: entry[0])
+                    del following[beam_width:]
+                    truncated = True
+                layer = following
+            #A pass that never had to drop a board cannot be improved by widening
+            if not truncated:
+                return best
+            beam_width *= 2
+
+def solve_anytime(puzzle, max_nodes=DEFAULT_NODES, seconds=None, weight=DEFAULT_WEIGHT,
+                  beam_width=None, heuristic=None):
+    """
+    Generate a short solution string within a node budget and/or time
+    budget in seconds, never longer than solve_puzzle(compact=True)
+    Raises ValueError if the puzzle is not solvable
+    Updates the puzzle and returns a move string
+    """
+    if puzzle.row0_invariant(0):
+        return ""
+    deadline = None if seconds is None else time.monotonic() + seconds
+    #The fast solution bounds the search and is the answer if nothing beats it
+    fallback = puzzle.clone().solve_puzzle(compact=True)
+    solver = AnytimeSearch(puzzle.get_height(), puzzle.get_width(), heuristic,
+                           weight, beam_width)
+    soln_string = solver.solve_tiles(puzzle.get_tiles(), max_nodes, deadline, fallback)
+    puzzle.update_puzzle(soln_string)
+    return soln_string
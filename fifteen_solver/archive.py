@@ -0,0 +1,303 @@
+"""
+Compact binary storage for boards and their solutions
+
+Moves are packed 2 bits each, four to a byte (first move in the low bits),
+using the same direction codes as fifteen_solver.vectorized: l=0, r=1, u=2, d=3.
+
+An archive file is a header followed by length-prefixed records:
+    header: MAGIC, record count
+    record: height, width, move count (the prefix), then the starting
+            board as height * width little-endian tile numbers (1, 2 or 4
+            bytes each, the smallest that fits), then the packed moves
+load memory-maps the file; records read straight from the mapping and
+only build a Puzzle or unpack a move string when asked to. Close the
+archive (or use it as a context manager) to release the mapping.
+
+    #A Puzzle is stored as it stands, so keep a copy of the starting board
+    #(the clone is taken before solve_puzzle moves the tiles)
+    dump("solutions.fsa", ((puzzle.clone(), puzzle.solve_puzzle()) for puzzle in puzzles))
+    with load("solutions.fsa") as archive:
+        for record in archive:
+            puzzle = record.puzzle()
+            puzzle.update_puzzle(record.moves())
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+
+from fifteen_solver.puzzle import Puzzle
+
+DIRECTIONS = "lrud"
+
+MAGIC = b"FSARC1"
+_HEADER = struct.Struct("<6sQ")
+_RECORD = struct.Struct("<HHQ")
+
+#ASCII move -> 2-bit code, and back
+_ENCODE = bytes.maketrans(DIRECTIONS.encode(), bytes(range(4)))
+_DECODE = bytes.maketrans(bytes(range(4)), DIRECTIONS.encode())
+
+def packed_size(move_count):
+    """
+    Bytes needed to pack a number of moves
+    Returns an integer
+    """
+    return (move_count + 3) // 4
+
+def pack_moves(move_string):
+    """
+    Pack a move string at 2 bits per move; the last byte is padded with
+    "l" codes, so the move count has to be stored alongside
+    Returns a bytes object
+    """
+    codes = move_string.encode("ascii").translate(_ENCODE)
+    assert max(codes, default=0) < 4, "invalid direction in move string"
+    size = packed_size(len(codes))
+    #Codes never exceed 3, so the four shifted lanes can be summed without carries
+    packed = 0
+    for lane in range(4):
+        packed += int.from_bytes(codes[lane::4], "little") << (2 * lane)
+    return packed.to_bytes(size, "little")
+
+def unpack_moves(data, move_count):
+    """
+    Unpack the first move_count moves from packed bytes
+    (any bytes-like object, such as a memoryview)
+    Returns a string
+    """
+    size = packed_size(move_count)
+    assert size <= len(data), "Packed moves are truncated"
+    packed = int.from_bytes(data[:size], "little")
+    mask = int.from_bytes(b"\x03" * size, "little")
+    codes = bytearray(4 * size)
+    for lane in range(4):
+        codes[lane::4] = ((packed >> (2 * lane)) & mask).to_bytes(size, "little")
+    return codes[:move_count].translate(_DECODE).decode("ascii")
+
+def _tile_code(size):
+    """
+    Array typecode used for the tiles of a board with size cells
+    Returns a one-character string
+    """
+    if size <= 1 << 8:
+        return "B"
+    if size <= 1 << 16:
+        return "H"
+    return "I"
+
+def _tiles_from(view, size):
+    """
+    Decode size little-endian tile numbers from a buffer
+    Returns an array
+    """
+    tiles = array(_tile_code(size))
+    tiles.frombytes(view)
+    if sys.byteorder == "big":
+        tiles.byteswap()
+    return tiles
+
+def _tiles_bytes(tiles):
+    """
+    Encode a flat list of tile numbers little-endian
+    Returns a bytes object
+    """
+    encoded = array(_tile_code(len(tiles)), tiles)
+    if sys.byteorder == "big":
+        encoded.byteswap()
+    return encoded.tobytes()
+
+class Record:
+    """
+    One board and its solution inside an archive, as offsets into the
+    archive's view of the file; it stops working once the archive is closed
+    """
+
+    __slots__ = ("_height", "_width", "_move_count", "_view", "_tiles_start",
+                 "_moves_start", "_moves_end")
+
+    def __init__(self, puzzle_height, puzzle_width, move_count, view,
+                 tiles_start, moves_start, moves_end):
+        """
+        Describe one record by the byte ranges of its tiles and packed moves
+        Returns a Record object
+        """
+        self._height = puzzle_height
+        self._width = puzzle_width
+        self._move_count = move_count
+        self._view = view
+        self._tiles_start = tiles_start
+        self._moves_start = moves_start
+        self._moves_end = moves_end
+
+    def get_height(self):
+        """
+        Getter for board height
+        Returns an integer
+        """
+        return self._height
+
+    def get_width(self):
+        """
+        Getter for board width
+        Returns an integer
+        """
+        return self._width
+
+    def get_move_count(self):
+        """
+        Getter for the number of moves in the solution
+        Returns an integer
+        """
+        return self._move_count
+
+    def packed_moves(self):
+        """
+        Zero-copy view of the packed solution; the archive cannot be
+        closed until the view is released
+        Returns a memoryview
+        """
+        return self._view[self._moves_start:self._moves_end]
+
+    def tiles(self):
+        """
+        Starting board in flat row-major order
+        Returns an array
+        """
+        with self._view[self._tiles_start:self._moves_start] as tiles:
+            return _tiles_from(tiles, self._height * self._width)
+
+    def puzzle(self, checked=True):
+        """
+        Build the starting board
+        Returns a Puzzle object
+        """
+        return Puzzle.from_tiles(self._height, self._width, self.tiles(), checked)
+
+    def moves(self):
+        """
+        Unpack the solution
+        Returns a string
+        """
+        with self.packed_moves() as packed:
+            return unpack_moves(packed, self._move_count)
+
+class Archive:
+    """
+    Memory-mapped archive file; iterate over it (or index it) for records
+    Use it as a context manager, or call close, to release the mapping
+    """
+
+    def __init__(self, path):
+        """
+        Map an archive file read-only and check its header
+        Returns an Archive object
+        """
+        with open(path, "rb") as stream:
+            self._mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mapped)
+        magic, self._count = _HEADER.unpack_from(self._view, 0)
+        assert magic == MAGIC, "Not a solution archive: " + str(path)
+        self._offsets = None
+
+    def close(self):
+        """
+        Release the view and the mapping; records from this archive stop
+        working, and views from Record.packed_moves must be released first
+        (mmap raises BufferError otherwise)
+        """
+        self._view.release()
+        self._mapped.close()
+
+    def __enter__(self):
+        """
+        Use the archive in a with statement
+        Returns the Archive object
+        """
+        return self
+
+    def __exit__(self, *dummy_error):
+        """
+        Close the archive at the end of the with statement
+        """
+        self.close()
+
+    def __len__(self):
+        """
+        Number of records
+        Returns an integer
+        """
+        return self._count
+
+    def _record_at(self, offset):
+        """
+        Read the record starting at a byte offset
+        Returns a (Record, offset of the next record) tuple
+        """
+        view = self._view
+        puzzle_height, puzzle_width, move_count = _RECORD.unpack_from(view, offset)
+        offset += _RECORD.size
+        size = puzzle_height * puzzle_width
+        tiles_end = offset + size * array(_tile_code(size)).itemsize
+        moves_end = tiles_end + packed_size(move_count)
+        record = Record(puzzle_height, puzzle_width, move_count,
+                        view, offset, tiles_end, moves_end)
+        return record, moves_end
+
+    def __iter__(self):
+        """
+        Walk the records in file order
+        Yields Record objects
+        """
+        offset = _HEADER.size
+        for dummy_record in range(self._count):
+            record, offset = self._record_at(offset)
+            yield record
+
+    def __getitem__(self, index):
+        """
+        Random access to a record; the first call indexes the whole file
+        Returns a Record object
+        """
+        if self._offsets is None:
+            offsets = array("Q")
+            offset = _HEADER.size
+            for dummy_record in range(self._count):
+                offsets.append(offset)
+                offset = self._record_at(offset)[1]
+            self._offsets = offsets
+        return self._record_at(self._offsets[index])[0]
+
+def dump(path, solutions):
+    """
+    Write an archive from an iterable of (board, move string) pairs, where
+    a board is a Puzzle or a list of rows; a Puzzle's current state is
+    stored, so pass a clone taken before solving it, not the solved puzzle
+    Returns the number of records written
+    """
+    count = 0
+    with open(path, "wb") as stream:
+        stream.write(_HEADER.pack(MAGIC, 0))
+        for board, move_string in solutions:
+            if isinstance(board, Puzzle):
+                puzzle_height, puzzle_width = board.get_height(), board.get_width()
+                tiles = board.get_tiles()
+            else:
+                puzzle_height, puzzle_width = len(board), len(board[0])
+                tiles = [value for row in board for value in row]
+            stream.write(_RECORD.pack(puzzle_height, puzzle_width, len(move_string)))
+            stream.write(_tiles_bytes(tiles))
+            stream.write(pack_moves(move_string))
+            count += 1
+        #The count is only known at the end, so the header is written twice
+        stream.seek(0)
+        stream.write(_HEADER.pack(MAGIC, count))
+    return count
+
+def load(path):
+    """
+    Memory-map an archive written by dump; close it when done
+    Returns an Archive object
+    """
+    return Archive(path)
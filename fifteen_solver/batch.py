@@ -0,0 +1,77 @@
+"""
+Batch solving across all cores
+Grids are read lazily and fanned out to a process pool in chunks; results
+stream back as (index, move string, stats) in completion order, with only
+a bounded number of chunks in flight at any time
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from fifteen_solver.puzzle import Puzzle
+
+#Chunks kept in flight per worker, so the pool never runs dry between waits
+CHUNKS_PER_WORKER = 2
+
+def solve_grid(grid, compact=False, window=0, checked=False):
+    """
+    Solve a single grid given as a list of rows
+    Returns a (move string, stats dictionary) tuple
+    """
+    start = time.perf_counter()
+    puzzle = Puzzle(len(grid), len(grid[0]), grid, checked)
+    soln_string = puzzle.solve_puzzle(compact, window)
+    stats = {"height": puzzle.get_height(),
+             "width": puzzle.get_width(),
+             "moves": len(soln_string),
+             "seconds": time.perf_counter() - start}
+    return soln_string, stats
+
+def _solve_chunk(chunk, compact, window, checked):
+    """
+    Worker entry point: solve a list of (index, grid) pairs; a grid that
+    cannot be solved gets a None move string and an error in its stats,
+    so one bad board never takes the rest of the batch down with it
+    Returns a list of (index, move string, stats) tuples
+    """
+    results = []
+    for index, grid in chunk:
+        start = time.perf_counter()
+        try:
+            soln_string, stats = solve_grid(grid, compact, window, checked)
+        except Exception as error:
+            soln_string = None
+            stats = {"error": "%s: %s" % (type(error).__name__, error),
+                     "seconds": time.perf_counter() - start}
+        results.append((index, soln_string, stats))
+    return results
+
+def solve_batch(grids, workers=None, chunk_size=64, compact=False, window=0, checked=False):
+    """
+    Solve an iterable of grids on a process pool
+    Indices refer to positions in the input iterable; grids that cannot be
+    solved come back with a None move string and an "error" stat
+    Yields (index, move string, stats) tuples as chunks complete
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    numbered = enumerate(grids)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        exhausted = False
+        while True:
+            #Top up the pool without reading more input than it can hold
+            while not exhausted and len(pending) < workers * CHUNKS_PER_WORKER:
+                chunk = list(islice(numbered, chunk_size))
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(_solve_chunk, chunk, compact, window, checked))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for result in future.result():
+                    yield result
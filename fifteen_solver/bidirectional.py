@@ -0,0 +1,197 @@
+"""
+Bidirectional breadth-first search for small boards (2x3, 3x3, 2x4, ...)
+Searches outward from the input board and from the blank-at-(0,0) goal
+at once, so answers are guaranteed optimal without any heuristic.
+
+Boards are packed into integers (4 bits per cell) and each side's visited
+set is a bytearray indexed by permutation rank, holding the direction the
+blank moved to first reach that arrangement. That is one byte per
+possible arrangement per side, which is why boards are capped at
+MAX_CELLS. Move strings can be replayed with Puzzle.update_puzzle.
+
+Running the module cross-checks solve_puzzle against it on random boards:
+    python -m fifteen_solver.bidirectional HEIGHT WIDTH [COUNT] [SEED]
+"""
+
+import sys
+
+from fifteen_solver.endgame import DIRECTIONS, UNREACHABLE, permutation_rank
+from fifteen_solver.moves import INVERSE
+from fifteen_solver.optimal import neighbour_table
+from fifteen_solver.puzzle import Puzzle
+from fifteen_solver.scramble import is_solvable, random_grids
+
+#Largest board searched (10! arrangements, one byte each per side)
+MAX_CELLS = 10
+
+#Code marking the state a side started from
+ROOT = len(DIRECTIONS)
+
+def pack_tiles(tiles):
+    """
+    Pack a flat tile list into an integer, 4 bits per cell
+    Returns an integer
+    """
+    state = 0
+    for index, tile in enumerate(tiles):
+        state |= tile << (4 * index)
+    return state
+
+def unpack_tiles(state, cells):
+    """
+    Inverse of pack_tiles
+    Returns a list of integers
+    """
+    return [(state >> (4 * index)) & 15 for index in range(cells)]
+
+class BidirectionalBFS:
+    """
+    Meet-in-the-middle breadth-first search over packed boards of one size
+    """
+
+    def __init__(self, puzzle_height, puzzle_width):
+        """
+        Set up move tables for the given board size
+        Returns a BidirectionalBFS object
+        """
+        cells = puzzle_height * puzzle_width
+        assert cells <= MAX_CELLS, "Bidirectional search is limited to " + str(MAX_CELLS) + " cells"
+        self._height = puzzle_height
+        self._width = puzzle_width
+        self._cells = cells
+        self._count = 1
+        for factor in range(2, cells + 1):
+            self._count *= factor
+        self._neighbours = [tuple((DIRECTIONS.index(direction), other)
+                                  for direction, other in moves)
+                            for moves in neighbour_table(puzzle_height, puzzle_width)]
+        self._nodes = 0
+
+    def get_nodes(self):
+        """
+        Getter for the number of states expanded by the last solve
+        Returns an integer
+        """
+        return self._nodes
+
+    def _rank(self, state):
+        """
+        Visited-set index of a packed board
+        Returns an integer
+        """
+        return permutation_rank(unpack_tiles(state, self._cells))
+
+    def _expand(self, frontier, seen, other_seen):
+        """
+        Expand one whole BFS layer of one side
+        Returns a (next layer, meeting state or None) tuple
+        """
+        neighbours = self._neighbours
+        rank = self._rank
+        following = []
+        self._nodes += len(frontier)
+        for state, zero in frontier:
+            for code, other in neighbours[zero]:
+                tile = (state >> (4 * other)) & 15
+                moved = state - (tile << (4 * other)) + (tile << (4 * zero))
+                index = rank(moved)
+                if seen[index] != UNREACHABLE:
+                    continue
+                seen[index] = code
+                if other_seen[index] != UNREACHABLE:
+                    return following, moved
+                following.append((moved, other))
+        return following, None
+
+    def _trace(self, state, seen):
+        """
+        Walk from a state back to its side's root by undoing recorded moves
+        Returns the list of directions taken on that walk
+        """
+        path = []
+        tiles = unpack_tiles(state, self._cells)
+        zero = tiles.index(0)
+        while True:
+            code = seen[permutation_rank(tiles)]
+            if code == ROOT:
+                return path
+            direction = INVERSE[DIRECTIONS[code]]
+            other = dict(self._neighbours[zero])[DIRECTIONS.index(direction)]
+            tiles[zero], tiles[other] = tiles[other], 0
+            zero = other
+            path.append(direction)
+
+    def solve_tiles(self, tiles):
+        """
+        Find a shortest move string for a flat row-major tile list
+        Returns a string
+        """
+        tiles = list(tiles)
+        assert len(tiles) == self._cells, "Board does not match the search size"
+        if not is_solvable(tiles, self._width):
+            raise ValueError("Puzzle is not solvable")
+        self._nodes = 0
+        start = pack_tiles(tiles)
+        goal = pack_tiles(range(self._cells))
+        if start == goal:
+            return ""
+        forward = bytearray([UNREACHABLE]) * self._count
+        backward = bytearray([UNREACHABLE]) * self._count
+        forward[self._rank(start)] = ROOT
+        backward[self._rank(goal)] = ROOT
+        forward_layer = [(start, tiles.index(0))]
+        backward_layer = [(goal, 0)]
+        #Once both sides have whole layers and no overlap, the first meeting is optimal
+        while True:
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting = self._expand(forward_layer, forward, backward)
+            else:
+                backward_layer, meeting = self._expand(backward_layer, backward, forward)
+            if meeting is not None:
+                break
+            assert forward_layer and backward_layer, "Search space exhausted"
+        #Walking back to the start retraces the forward moves in reverse;
+        #walking back to the goal is the rest of the solution as it stands
+        head = self._trace(meeting, forward)
+        head = [INVERSE[direction] for direction in reversed(head)]
+        tail = self._trace(meeting, backward)
+        return "".join(head + tail)
+
+def solve_bidirectional(puzzle):
+    """
+    Generate a shortest solution string for a small puzzle
+    Updates the puzzle and returns a move string
+    """
+    solver = BidirectionalBFS(puzzle.get_height(), puzzle.get_width())
+    soln_string = solver.solve_tiles(puzzle.get_tiles())
+    puzzle.update_puzzle(soln_string)
+    return soln_string
+
+def cross_check(puzzle_height, puzzle_width, count=100, seed=0):
+    """
+    Solve random boards with both solve_puzzle and the bidirectional search,
+    checking both solutions and that neither beats the optimum
+    Returns a dictionary of total and worst-case move counts
+    """
+    solver = BidirectionalBFS(puzzle_height, puzzle_width)
+    totals = {"boards": 0, "greedy_moves": 0, "optimal_moves": 0, "worst_ratio": 1.0}
+    for grid in random_grids(puzzle_height, puzzle_width, count, seed):
+        greedy = Puzzle(puzzle_height, puzzle_width, grid)
+        greedy_string = greedy.solve_puzzle()
+        optimal = Puzzle(puzzle_height, puzzle_width, grid)
+        optimal_string = solver.solve_tiles(optimal.get_tiles())
+        optimal.update_puzzle(optimal_string)
+        assert greedy.row0_invariant(0) and optimal.row0_invariant(0), "Solution incorrect!"
+        assert len(optimal_string) <= len(greedy_string), "Greedy beat the optimum!"
+        totals["boards"] += 1
+        totals["greedy_moves"] += len(greedy_string)
+        totals["optimal_moves"] += len(optimal_string)
+        if optimal_string:
+            totals["worst_ratio"] = max(totals["worst_ratio"],
+                                        len(greedy_string) / len(optimal_string))
+    return totals
+
+if __name__ == "__main__":
+    #Oracle run: python -m fifteen_solver.bidirectional HEIGHT WIDTH [COUNT] [SEED]
+    ARGS = [int(argument) for argument in sys.argv[1:]]
+    print(cross_check(*ARGS))
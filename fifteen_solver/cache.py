@@ -0,0 +1,120 @@
+"""
+Transposition table of solved boards
+Boards are keyed by Puzzle.get_key (the raw tile bytes, so there are no
+hash collisions to guard against) and evicted least recently used first.
+Besides whole boards, solve_cached stores the moves for the top-row
+residual left after phase one, so boards that only differ further down
+still reuse the tail of their solution.
+"""
+
+from collections import OrderedDict
+
+from fifteen_solver.moves import compact_moves
+
+class SolutionCache:
+    """
+    Bounded LRU map from board keys to move strings, with hit/miss counters
+    """
+
+    def __init__(self, capacity=65536):
+        """
+        Create an empty cache holding at most capacity entries
+        Returns a SolutionCache object
+        """
+        assert capacity > 0, "Cache capacity must be positive"
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self):
+        """
+        Number of cached entries
+        Returns an integer
+        """
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Look up a key, marking it most recently used
+        Returns a move string, or None on a miss
+        """
+        soln_string = self._entries.get(key)
+        if soln_string is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return soln_string
+
+    def put(self, key, soln_string):
+        """
+        Store a move string, evicting the least recently used entry if full
+        """
+        self._entries[key] = soln_string
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self):
+        """
+        Drop every entry and reset the counters
+        """
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def stats(self):
+        """
+        Snapshot of the counters
+        Returns a dictionary
+        """
+        lookups = self._hits + self._misses
+        return {"hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "size": len(self._entries),
+                "capacity": self._capacity}
+
+def solve_cached(puzzle, cache, compact=False, window=0, endgame=True):
+    """
+    solve_puzzle backed by a SolutionCache: whole boards are looked up first,
+    then the top-row residual once phase one has run
+    Raises ValueError if the puzzle is not solvable
+    Updates the puzzle and returns a move string
+    """
+    board_key = ("board", compact, window, endgame) + puzzle.get_key()
+    soln_string = cache.get(board_key)
+    if soln_string is not None:
+        puzzle.update_puzzle(soln_string)
+        return soln_string
+    if puzzle.row0_invariant(0):
+        return ""
+    if not puzzle.is_solvable():
+        raise ValueError("Puzzle is not solvable")
+    if puzzle.is_checked():
+        start = puzzle.clone()
+    zero_row, zero_col = puzzle.current_position(0, 0)
+    stop_row, block = puzzle.phase_plan(endgame)
+    soln_string = puzzle.solve_lower_rows(stop_row)
+    #Rows below stop_row are solved now, so the rows above decide the rest
+    residual_key = ("top", endgame) + puzzle.get_key(stop_row + 1)
+    residual = cache.get(residual_key)
+    if residual is None:
+        residual = puzzle.solve_final_rows(block)
+        cache.put(residual_key, residual)
+    else:
+        puzzle.update_puzzle(residual)
+    soln_string += residual
+    if compact:
+        soln_string = compact_moves(soln_string, puzzle.get_height(), puzzle.get_width(),
+                                    zero_row, zero_col, window)
+    if puzzle.is_checked():
+        start.update_puzzle(soln_string)
+        assert start.row0_invariant(0), "Puzzle solution incorrect!"
+    cache.put(board_key, soln_string)
+    return soln_string
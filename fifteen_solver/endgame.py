@@ -0,0 +1,110 @@
+"""
+Optimal endgame tables for the last small block of a solve
+A table covers every arrangement of a block (2x3 or 3x2) with its own
+blank-at-(0,0) goal. It is built by breadth-first search from the goal on
+first use and stored as one byte per permutation rank: the direction of
+the first move of an optimal solution (or UNREACHABLE)
+"""
+
+from fifteen_solver.moves import INVERSE, STEP
+
+DIRECTIONS = "lrud"
+UNREACHABLE = 255
+
+#Tables already built, keyed by (block height, block width)
+_TABLES = {}
+
+def permutation_rank(tiles):
+    """
+    Lexicographic rank of a permutation of 0..k-1 (Lehmer code)
+    Returns an integer
+    """
+    rank = 0
+    size = len(tiles)
+    for index in range(size):
+        smaller = 0
+        for later in range(index + 1, size):
+            if tiles[later] < tiles[index]:
+                smaller += 1
+        rank = rank * (size - index) + smaller
+    return rank
+
+def _neighbour(zero, direction, block_height, block_width):
+    """
+    Index the blank moves to, or None if that leaves the block
+    Returns an integer or None
+    """
+    step_row, step_col = STEP[direction]
+    row, col = divmod(zero, block_width)
+    row += step_row
+    col += step_col
+    if 0 <= row < block_height and 0 <= col < block_width:
+        return row * block_width + col
+    return None
+
+class EndgameTable:
+    """
+    Next-move table for every arrangement of one block size
+    """
+
+    def __init__(self, block_height, block_width):
+        """
+        Build the table by breadth-first search from the solved block
+        Returns an EndgameTable object
+        """
+        self._height = block_height
+        self._width = block_width
+        size = block_height * block_width
+        count = 1
+        for factor in range(2, size + 1):
+            count *= factor
+        self._next = bytearray([UNREACHABLE]) * count
+        goal = tuple(range(size))
+        frontier = [goal]
+        #The goal is marked with a code that is never read as a move
+        self._next[permutation_rank(goal)] = len(DIRECTIONS)
+        while frontier:
+            following = []
+            for tiles in frontier:
+                zero = tiles.index(0)
+                for code, direction in enumerate(DIRECTIONS):
+                    other = _neighbour(zero, direction, block_height, block_width)
+                    if other is None:
+                        continue
+                    moved = list(tiles)
+                    moved[zero], moved[other] = moved[other], 0
+                    rank = permutation_rank(moved)
+                    if self._next[rank] == UNREACHABLE:
+                        #Undoing this move is the first step back towards the goal
+                        self._next[rank] = DIRECTIONS.index(INVERSE[direction])
+                        following.append(tuple(moved))
+            frontier = following
+
+    def solve_tiles(self, tiles):
+        """
+        Optimal move string for a flat row-major block
+        Returns a string
+        """
+        tiles = list(tiles)
+        zero = tiles.index(0)
+        moves = []
+        while True:
+            code = self._next[permutation_rank(tiles)]
+            assert code != UNREACHABLE, "Endgame block is not solvable"
+            if code == len(DIRECTIONS):
+                return "".join(moves)
+            direction = DIRECTIONS[code]
+            other = _neighbour(zero, direction, self._height, self._width)
+            tiles[zero], tiles[other] = tiles[other], 0
+            zero = other
+            moves.append(direction)
+
+def endgame_table(block_height, block_width):
+    """
+    Shared table for a block size, built the first time it is asked for
+    Returns an EndgameTable object
+    """
+    key = (block_height, block_width)
+    if key not in _TABLES:
+        _TABLES[key] = EndgameTable(block_height, block_width)
+    return _TABLES[key]
@@ -0,0 +1,117 @@
+"""
+Admissible heuristics for search-based solvers built on Puzzle
+
+A heuristic works on a flat row-major tile list (see Puzzle.get_tiles)
+for the blank-at-(0,0) goal, where tile t belongs at index t.
+Every heuristic offers the same two methods:
+
+    initial(tiles) -> estimate for the whole board
+    update(tiles, value, tile, src, dst) -> estimate after a single move
+
+update is called after the move has been applied to tiles, i.e. tile
+now sits at dst and the blank at src. It must not leave tiles modified.
+"""
+
+def _conflicts(goal_offsets):
+    """
+    Count the tiles that have to leave a line so that the rest can pass
+    each other in it, i.e. the line length minus its longest increasing run
+    Returns an integer
+    """
+    longest = []
+    for offset in goal_offsets:
+        #Patience sorting: longest[k] is the smallest tail of a run of length k + 1
+        low, high = 0, len(longest)
+        while low < high:
+            middle = (low + high) // 2
+            if longest[middle] < offset:
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(longest):
+            longest.append(offset)
+        else:
+            longest[low] = offset
+    return len(goal_offsets) - len(longest)
+
+class ManhattanLinearConflict:
+    """
+    Manhattan distance plus two moves for every linear conflict
+    """
+
+    def __init__(self, puzzle_height, puzzle_width):
+        """
+        Precompute the distance table for the given board size
+        Returns a ManhattanLinearConflict object
+        """
+        self._height = puzzle_height
+        self._width = puzzle_width
+        size = puzzle_height * puzzle_width
+        self._size = size
+        #Flat table: _distance[tile * size + index]
+        self._distance = [0] * (size * size)
+        for tile in range(1, size):
+            tile_row, tile_col = divmod(tile, puzzle_width)
+            for index in range(size):
+                row, col = divmod(index, puzzle_width)
+                self._distance[tile * size + index] = abs(tile_row - row) + abs(tile_col - col)
+
+    def _row_conflicts(self, tiles, row):
+        """
+        Linear conflicts among tiles in the given row that belong to it
+        Returns an integer
+        """
+        width = self._width
+        start = row * width
+        return _conflicts([tile - start for tile in tiles[start:start + width]
+                           if tile and start <= tile < start + width])
+
+    def _col_conflicts(self, tiles, col):
+        """
+        Linear conflicts among tiles in the given column that belong to it
+        Returns an integer
+        """
+        width = self._width
+        return _conflicts([tile // width for tile in tiles[col::width]
+                           if tile and tile % width == col])
+
+    def initial(self, tiles):
+        """
+        Estimate the number of moves needed to solve the whole board
+        Returns an integer
+        """
+        size = self._size
+        value = 0
+        for index in range(size):
+            value += self._distance[tiles[index] * size + index]
+        for row in range(self._height):
+            value += 2 * self._row_conflicts(tiles, row)
+        for col in range(self._width):
+            value += 2 * self._col_conflicts(tiles, col)
+        return value
+
+    def update(self, tiles, value, tile, src, dst):
+        """
+        Adjust an estimate after tile moved from src to dst
+        Returns an integer
+        """
+        size = self._size
+        width = self._width
+        value += self._distance[tile * size + dst] - self._distance[tile * size + src]
+        #A horizontal move can only change the moved tile's goal column, and only
+        #if that is one of the two columns involved; likewise rows for vertical moves
+        if src // width == dst // width:
+            line = tile % width
+            if line != src % width and line != dst % width:
+                return value
+            lines = self._col_conflicts
+        else:
+            line = tile // width
+            if line != src // width and line != dst // width:
+                return value
+            lines = self._row_conflicts
+        after = lines(tiles, line)
+        tiles[src], tiles[dst] = tile, 0
+        before = lines(tiles, line)
+        tiles[src], tiles[dst] = 0, tile
+        return value + 2 * (after - before)
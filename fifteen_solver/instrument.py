@@ -0,0 +1,155 @@
+"""
+Optional instrumentation of the Puzzle hot path
+
+enable() swaps counting wrappers in for Puzzle methods on the class
+itself; disable() puts the originals back. While disabled nothing is
+wrapped, so the solver runs at full speed. Counters cover calls, wall
+time per phase, moves emitted (solve_* and iter_* phases and the
+move-building helpers) or applied (update_puzzle) and board scans: the
+row recounts the Puzzle falls back on when its per-row counts are
+stale. The invariant checks themselves answer from those counts, so
+they are only counted as calls. The iter_*
+phases are timed while they produce each chunk, not while the caller
+holds it.
+
+    from fifteen_solver import instrument
+    instrument.enable()
+    ...
+    instrument.stats()            # nested dictionary
+    instrument.prometheus_text()  # Prometheus exposition format
+"""
+
+import functools
+import time
+
+from fifteen_solver.puzzle import Puzzle
+
+#Phases and tile solvers: calls, wall time and length of the returned moves
+TIMED = ("solve_puzzle", "solve_lower_rows", "solve_top_rows", "solve_final_rows",
+         "solve_2x2", "solve_endgame", "solve_interior_tile", "solve_col0_tile",
+         "solve_row0_tile", "solve_row1_tile")
+#Streaming phases: calls, wall time spent producing chunks and moves yielded
+STREAMED = ("iter_solution", "iter_lower_rows", "iter_top_rows", "iter_final_rows")
+#Helpers that extend the move string passed in: calls and moves they added
+BUILDERS = ("transfer_zero", "zero_over_target", "position_tile")
+#Fallback that reads a board row itself, each call counted as one scan
+SCANS = ("_recount",)
+#Plain call counts
+COUNTED = ("current_position", "lower_row_invariant", "row0_invariant", "row1_invariant",
+           "block_invariant")
+
+FIELDS = ("calls", "seconds", "moves", "scans")
+
+_originals = {}
+_counters = {}
+
+def _wrap(name, original):
+    """
+    Build the counting wrapper for one Puzzle method
+    Returns a function
+    """
+    counters = _counters[name]
+    if name in TIMED:
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                soln_string = original(self, *args, **kwargs)
+            finally:
+                counters["calls"] += 1
+                counters["seconds"] += time.perf_counter() - start
+            counters["moves"] += len(soln_string)
+            return soln_string
+    elif name in STREAMED:
+        def wrapper(self, *args, **kwargs):
+            counters["calls"] += 1
+            chunks = original(self, *args, **kwargs)
+            while True:
+                start = time.perf_counter()
+                try:
+                    soln_string = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    counters["seconds"] += time.perf_counter() - start
+                counters["moves"] += len(soln_string)
+                yield soln_string
+    elif name in BUILDERS:
+        def wrapper(self, soln_string, *args, **kwargs):
+            counters["calls"] += 1
+            extended = original(self, soln_string, *args, **kwargs)
+            counters["moves"] += len(extended) - len(soln_string)
+            return extended
+    elif name == "update_puzzle":
+        def wrapper(self, move_string):
+            counters["calls"] += 1
+            counters["moves"] += len(move_string)
+            return original(self, move_string)
+    elif name in SCANS:
+        def wrapper(self, *args):
+            counters["calls"] += 1
+            counters["scans"] += 1
+            return original(self, *args)
+    else:
+        def wrapper(self, *args):
+            counters["calls"] += 1
+            return original(self, *args)
+    return functools.wraps(original)(wrapper)
+
+def is_enabled():
+    """
+    Check whether Puzzle is currently instrumented
+    Returns a boolean
+    """
+    return bool(_originals)
+
+def enable():
+    """
+    Swap instrumented methods into Puzzle (no-op if already enabled)
+    """
+    if _originals:
+        return
+    for name in TIMED + STREAMED + BUILDERS + SCANS + COUNTED + ("update_puzzle",):
+        _counters.setdefault(name, dict.fromkeys(FIELDS, 0))
+        _originals[name] = getattr(Puzzle, name)
+        setattr(Puzzle, name, _wrap(name, _originals[name]))
+
+def disable():
+    """
+    Restore the original Puzzle methods; counters are kept
+    """
+    for name, original in _originals.items():
+        setattr(Puzzle, name, original)
+    _originals.clear()
+
+def reset():
+    """
+    Zero every counter
+    """
+    for counters in _counters.values():
+        for field in FIELDS:
+            counters[field] = 0
+
+def stats():
+    """
+    Snapshot of the counters of every instrumented method
+    Returns a dictionary of method name -> {calls, seconds, moves, scans}
+    """
+    return {name: dict(counters) for name, counters in _counters.items()}
+
+def prometheus_text(prefix="fifteen_solver"):
+    """
+    Render the counters in the Prometheus text exposition format
+    Returns a string
+    """
+    descriptions = {"calls": "Calls per Puzzle method",
+                    "seconds": "Wall time spent in each Puzzle method",
+                    "moves": "Moves emitted (or applied, for update_puzzle) per Puzzle method",
+                    "scans": "Board row recounts per Puzzle method"}
+    lines = []
+    for field in FIELDS:
+        metric = "%s_%s_total" % (prefix, field)
+        lines.append("# HELP %s %s" % (metric, descriptions[field]))
+        lines.append("# TYPE %s counter" % metric)
+        for name in sorted(_counters):
+            lines.append('%s{method="%s"} %s' % (metric, name, _counters[name][field]))
+    return "\n".join(lines) + "\n"
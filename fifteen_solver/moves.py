@@ -0,0 +1,139 @@
+"""
+Move-string post-processing
+A move names the direction the blank travels in: "l", "r", "u" or "d"
+"""
+
+#Direction the blank moves in, and the one that undoes it
+INVERSE = {"l": "r", "r": "l", "u": "d", "d": "u"}
+
+#(row, col) step of the blank for each direction
+STEP = {"l": (0, -1), "r": (0, 1), "u": (-1, 0), "d": (1, 0)}
+
+#Longest window compared against the shortcut table by default
+SHORTCUT_WINDOW = 8
+
+#Shortcut tables already built, keyed by window length
+_TABLES = {}
+
+def cancel_inverses(move_string):
+    """
+    Remove every pair of consecutive moves that undo each other,
+    including pairs that only meet once an inner pair is gone
+    Returns a string
+    """
+    kept = []
+    for direction in move_string:
+        if kept and kept[-1] == INVERSE[direction]:
+            kept.pop()
+        else:
+            kept.append(direction)
+    return "".join(kept)
+
+def _effect(move_string):
+    """
+    Net effect of a move string on an unbounded board with the blank at
+    (0, 0): every cell whose content changed, paired with where that
+    content started. Equal effects mean interchangeable move strings
+    Returns a tuple of pairs
+    """
+    contents = {}
+    row, col = 0, 0
+    for direction in move_string:
+        step_row, step_col = STEP[direction]
+        other = (row + step_row, col + step_col)
+        contents[(row, col)] = contents.get(other, other)
+        contents[other] = (0, 0)
+        row, col = other
+    return tuple(sorted(item for item in contents.items() if item[0] != item[1]))
+
+def shortcut_table(window=SHORTCUT_WINDOW):
+    """
+    Breadth-first search over move strings up to the given length,
+    recording the first (hence shortest) string for every effect
+    Returns a dictionary from effect to move string
+    """
+    if window in _TABLES:
+        return _TABLES[window]
+    table = {(): ""}
+    frontier = [""]
+    for dummy_length in range(window):
+        following = []
+        for move_string in frontier:
+            for direction in "lrud":
+                if move_string and move_string[-1] == INVERSE[direction]:
+                    continue
+                extended = move_string + direction
+                effect = _effect(extended)
+                if effect not in table:
+                    table[effect] = extended
+                    following.append(extended)
+        frontier = following
+    _TABLES[window] = table
+    return table
+
+def _fits(move_string, puzzle_height, puzzle_width, zero_row, zero_col):
+    """
+    Check that a move string never takes the blank off the board
+    Returns a boolean
+    """
+    for direction in move_string:
+        step_row, step_col = STEP[direction]
+        zero_row += step_row
+        zero_col += step_col
+        if not (0 <= zero_row < puzzle_height and 0 <= zero_col < puzzle_width):
+            return False
+    return True
+
+def shorten_moves(move_string, puzzle_height, puzzle_width, zero_row, zero_col,
+                  window=SHORTCUT_WINDOW):
+    """
+    Scan left to right, replacing the longest window (up to the given
+    length) that has a strictly shorter equivalent staying on the board
+    (zero_row, zero_col) is the blank position before the first move
+    Returns a string
+    """
+    table = shortcut_table(window)
+    kept = []
+    index = 0
+    while index < len(move_string):
+        best_length, best_string = 1, move_string[index]
+        #Grow the window one move at a time, tracking its effect incrementally
+        contents = {}
+        row, col = 0, 0
+        for length in range(1, min(window, len(move_string) - index) + 1):
+            step_row, step_col = STEP[move_string[index + length - 1]]
+            other = (row + step_row, col + step_col)
+            contents[(row, col)] = contents.get(other, other)
+            contents[other] = (0, 0)
+            row, col = other
+            if length < 2:
+                continue
+            effect = tuple(sorted(item for item in contents.items() if item[0] != item[1]))
+            shortcut = table.get(effect)
+            if (shortcut is not None and len(shortcut) < length
+                    and length - len(shortcut) >= best_length - len(best_string)
+                    and _fits(shortcut, puzzle_height, puzzle_width, zero_row, zero_col)):
+                best_length, best_string = length, shortcut
+        kept.append(best_string)
+        for direction in best_string:
+            step_row, step_col = STEP[direction]
+            zero_row += step_row
+            zero_col += step_col
+        index += best_length
+    return "".join(kept)
+
+def compact_moves(move_string, puzzle_height, puzzle_width, zero_row, zero_col, window=0):
+    """
+    Cancel inverse pairs, then (if window > 0) keep substituting shorter
+    equivalent windows until the string stops shrinking
+    The result leaves the board exactly as the original string does
+    Returns a string
+    """
+    move_string = cancel_inverses(move_string)
+    while window > 0:
+        shorter = cancel_inverses(shorten_moves(move_string, puzzle_height, puzzle_width,
+                                                zero_row, zero_col, window))
+        if len(shorter) >= len(move_string):
+            break
+        move_string = shorter
+    return move_string
@@ -0,0 +1,134 @@
+"""
+Optimal solver for small boards (3x3, 4x4) using IDA*
+Move strings use the same alphabet and blank-at-(0,0) goal as Puzzle,
+so they can be replayed with Puzzle.update_puzzle
+"""
+
+import time
+
+from fifteen_solver.heuristics import ManhattanLinearConflict
+from fifteen_solver.moves import INVERSE
+from fifteen_solver.scramble import is_solvable
+
+#Nodes between deadline checks, minus one
+DEADLINE_MASK = 4095
+
+def neighbour_table(puzzle_height, puzzle_width):
+    """
+    For every blank index, list the (direction, index) pairs it can move to
+    Returns a list of tuples
+    """
+    table = []
+    for index in range(puzzle_height * puzzle_width):
+        row, col = divmod(index, puzzle_width)
+        moves = []
+        if col > 0:
+            moves.append(("l", index - 1))
+        if col < puzzle_width - 1:
+            moves.append(("r", index + 1))
+        if row > 0:
+            moves.append(("u", index - puzzle_width))
+        if row < puzzle_height - 1:
+            moves.append(("d", index + puzzle_width))
+        table.append(tuple(moves))
+    return table
+
+class IDAStar:
+    """
+    Iterative deepening A* over flat tile lists
+    The heuristic must be admissible for the answers to be optimal
+    """
+
+    def __init__(self, puzzle_height, puzzle_width, heuristic=None):
+        """
+        Set up move tables and the heuristic for the given board size
+        Defaults to Manhattan distance plus linear conflicts
+        Returns an IDAStar object
+        """
+        self._height = puzzle_height
+        self._width = puzzle_width
+        self._neighbours = neighbour_table(puzzle_height, puzzle_width)
+        if heuristic is None:
+            heuristic = ManhattanLinearConflict(puzzle_height, puzzle_width)
+        self._heuristic = heuristic
+        self._nodes = 0
+
+    def get_nodes(self):
+        """
+        Getter for the number of nodes expanded by the last solve
+        Returns an integer
+        """
+        return self._nodes
+
+    def solve_tiles(self, tiles, deadline=None):
+        """
+        Find a shortest move string for a flat row-major tile list
+        With a deadline (a time.monotonic() value), raises TimeoutError
+        once it passes
+        Returns a string
+        """
+        tiles = list(tiles)
+        #IDA* would deepen forever on a board of the wrong parity
+        if not is_solvable(tiles, self._width):
+            raise ValueError("Puzzle is not solvable")
+        goal = list(range(len(tiles)))
+        neighbours = self._neighbours
+        update = self._heuristic.update
+        path = []
+        nodes = 0
+
+        def search(zero, cost, value, bound, previous):
+            """
+            Depth-first search below the current f-bound
+            Returns 0 once solved, else the smallest f-value above the bound
+            """
+            nonlocal nodes
+            nodes += 1
+            #Checking the clock every node would dominate the search
+            if deadline is not None and nodes & DEADLINE_MASK == 0 and time.monotonic() > deadline:
+                raise TimeoutError("IDA* deadline passed")
+            total = cost + value
+            if total > bound:
+                return total
+            if value == 0 and tiles == goal:
+                return 0
+            smallest = None
+            for direction, other in neighbours[zero]:
+                if direction == previous:
+                    continue
+                tile = tiles[other]
+                tiles[zero] = tile
+                tiles[other] = 0
+                path.append(direction)
+                found = search(other, cost + 1, update(tiles, value, tile, other, zero),
+                               bound, INVERSE[direction])
+                if found == 0:
+                    return 0
+                path.pop()
+                tiles[other] = tile
+                tiles[zero] = 0
+                if smallest is None or found < smallest:
+                    smallest = found
+            return smallest
+
+        value = self._heuristic.initial(tiles)
+        bound = value
+        zero = tiles.index(0)
+        while True:
+            found = search(zero, 0, value, bound, None)
+            if found == 0:
+                self._nodes = nodes
+                return "".join(path)
+            assert found is not None, "No moves available"
+            bound = found
+
+def solve_optimal(puzzle, heuristic=None, deadline=None):
+    """
+    Generate a shortest solution string for a (small) puzzle
+    With a deadline, raises TimeoutError (leaving the puzzle alone) once it passes
+    Updates the puzzle and returns a move string
+    """
+    solver = IDAStar(puzzle.get_height(), puzzle.get_width(), heuristic)
+    soln_string = solver.solve_tiles(puzzle.get_tiles(), deadline)
+    puzzle.update_puzzle(soln_string)
+    return soln_string
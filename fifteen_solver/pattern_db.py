@@ -0,0 +1,312 @@
+"""
+Disjoint additive pattern databases for search-based solvers
+
+Each pattern is a set of tiles; its table holds, for every placement of
+those tiles, the fewest moves of pattern tiles needed to bring them home
+(moves of other tiles are free). Because the patterns are disjoint the
+table values can be summed and the result is still admissible.
+
+Tables are indexed by the rank of the placement (an ordered choice of
+distinct cells for the pattern tiles), so a k-tile table on n cells holds
+exactly n! / (n - k)! bytes with no unused entries. Tables are built once
+by breadth-first search and saved as raw bytes.
+load_pattern_database memory-maps the file, so every solver process on
+the machine shares one page-cached copy. A PatternDatabase offers the
+same initial/update methods as the heuristics in fifteen_solver.heuristics.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+
+from fifteen_solver.optimal import neighbour_table
+
+#File layout: header, then per pattern its tile count and tiles, then the tables
+MAGIC = b"FSPDB2"
+_HEADER = struct.Struct("<6sHHH")
+_NUMBER = struct.Struct("<H")
+
+#No table entry can reach this, so it marks unvisited placements while building
+UNSEEN = 255
+
+#Disjoint partitions of the tiles, as used by build_pattern_database by default
+DEFAULT_PATTERNS = {
+    (3, 3): ((1, 2, 3, 4), (5, 6, 7, 8)),
+    (4, 4): ((1, 2, 3, 5, 6, 7), (4, 8, 9, 12, 13, 14), (10, 11, 15)),
+    (5, 5): ((1, 2, 5, 6, 7), (3, 4, 8, 9, 14), (10, 11, 12, 15, 16),
+             (13, 18, 19, 23, 24), (17, 20, 21, 22)),
+}
+
+def placement_count(cells, slots):
+    """
+    Number of ways to place slots distinct tiles on cells cells
+    Returns an integer
+    """
+    count = 1
+    for slot in range(slots):
+        count *= cells - slot
+    return count
+
+def placement_rank(positions, cells):
+    """
+    Dense rank of a placement, given the cell of each pattern tile in order:
+    the i-th digit is the cell's index among the cells still free after
+    the first i tiles, in base (cells - i)
+    Returns an integer in range(placement_count(cells, len(positions)))
+    """
+    rank = 0
+    for slot, cell in enumerate(positions):
+        digit = cell
+        for earlier in positions[:slot]:
+            if earlier < cell:
+                digit -= 1
+        rank = rank * (cells - slot) + digit
+    return rank
+
+def placement_unrank(rank, cells, slots):
+    """
+    Inverse of placement_rank
+    Returns a list of cells, one per pattern tile
+    """
+    digits = []
+    for slot in range(slots - 1, -1, -1):
+        rank, digit = divmod(rank, cells - slot)
+        digits.append(digit)
+    free = list(range(cells))
+    return [free.pop(digit) for digit in reversed(digits)]
+
+def build_table(puzzle_height, puzzle_width, pattern):
+    """
+    Breadth-first search over placements of the pattern tiles, where the
+    blank wanders for free through cells not holding a pattern tile
+    Returns a bytearray with one entry per placement rank
+    """
+    cells = puzzle_height * puzzle_width
+    slots = len(pattern)
+    neighbours = [[other for dummy_direction, other in moves]
+                  for moves in neighbour_table(puzzle_height, puzzle_width)]
+    count = placement_count(cells, slots)
+    table = bytearray([UNSEEN]) * count
+    #One bit per (placement, blank cell); a whole blank region is marked at once
+    seen = bytearray((count * cells + 7) // 8)
+
+    def decode(positions):
+        """
+        Map each occupied cell to its pattern slot
+        Returns a list with -1 for cells not holding a pattern tile
+        """
+        occupied = [-1] * cells
+        for slot, cell in enumerate(positions):
+            occupied[cell] = slot
+        return occupied
+
+    def region(occupied, blank):
+        """
+        Cells the blank can reach without moving a pattern tile
+        Returns a list of cells
+        """
+        reached = [blank]
+        inside = [False] * cells
+        inside[blank] = True
+        for cell in reached:
+            for other in neighbours[cell]:
+                if not inside[other] and occupied[other] < 0:
+                    inside[other] = True
+                    reached.append(other)
+        return reached
+
+    goal = placement_rank(pattern, cells)
+    frontier = array("L")
+    for cell in region(decode(pattern), 0):
+        code = goal * cells + cell
+        seen[code >> 3] |= 1 << (code & 7)
+    frontier.append(goal * cells)
+    depth = 0
+    while frontier:
+        following = array("L")
+        for code in frontier:
+            index, blank = divmod(code, cells)
+            if table[index] == UNSEEN:
+                table[index] = depth
+            positions = placement_unrank(index, cells, slots)
+            occupied = decode(positions)
+            for cell in region(occupied, blank):
+                for other in neighbours[cell]:
+                    slot = occupied[other]
+                    if slot < 0:
+                        continue
+                    #Pattern tile at other slides into the blank at cell
+                    positions[slot] = cell
+                    moved = placement_rank(positions, cells)
+                    positions[slot] = other
+                    code = moved * cells + other
+                    if seen[code >> 3] & (1 << (code & 7)):
+                        continue
+                    occupied[other], occupied[cell] = -1, slot
+                    for reached in region(occupied, other):
+                        code = moved * cells + reached
+                        seen[code >> 3] |= 1 << (code & 7)
+                    occupied[other], occupied[cell] = slot, -1
+                    following.append(moved * cells + other)
+        frontier = following
+        depth += 1
+    return table
+
+class PatternDatabase:
+    """
+    Additive set of disjoint pattern tables, usable as a search heuristic
+    """
+
+    def __init__(self, puzzle_height, puzzle_width, patterns, tables, source=None):
+        """
+        Wrap prebuilt tables (bytes-like, one per pattern)
+        source keeps a backing object such as an mmap alive
+        Returns a PatternDatabase object
+        """
+        cells = puzzle_height * puzzle_width
+        used = set()
+        for pattern in patterns:
+            assert 0 not in pattern, "The blank cannot be part of a pattern"
+            assert used.isdisjoint(pattern), "Patterns must be disjoint"
+            used.update(pattern)
+        for pattern, table in zip(patterns, tables):
+            assert len(table) == placement_count(cells, len(pattern)), \
+                "Table size does not match pattern"
+        self._height = puzzle_height
+        self._width = puzzle_width
+        self._cells = cells
+        self._patterns = tuple(tuple(pattern) for pattern in patterns)
+        self._tables = list(tables)
+        self._source = source
+        #For every tile: (pattern number, slot in that pattern), or None
+        self._owner = [None] * cells
+        for number, pattern in enumerate(self._patterns):
+            for slot, tile in enumerate(pattern):
+                self._owner[tile] = (number, slot)
+        #Last known cell of every tile, kept up to date by initial and update
+        self._where = list(range(cells))
+
+    def get_height(self):
+        """
+        Getter for the board height the tables were built for
+        Returns an integer
+        """
+        return self._height
+
+    def get_width(self):
+        """
+        Getter for the board width the tables were built for
+        Returns an integer
+        """
+        return self._width
+
+    def get_patterns(self):
+        """
+        Getter for the tile patterns
+        Returns a tuple of tuples
+        """
+        return self._patterns
+
+    def _positions(self, tiles, pattern):
+        """
+        Cells of a pattern's tiles, from the tracked positions; a search
+        that backtracks without telling the heuristic leaves some of them
+        out of date, so each one is checked and only searched for if wrong
+        Returns a list of cells
+        """
+        where = self._where
+        positions = []
+        for tile in pattern:
+            cell = where[tile]
+            if tiles[cell] != tile:
+                cell = tiles.index(tile)
+                where[tile] = cell
+            positions.append(cell)
+        return positions
+
+    def initial(self, tiles):
+        """
+        Estimate the number of moves needed to solve the whole board
+        Returns an integer
+        """
+        for cell, tile in enumerate(tiles):
+            self._where[tile] = cell
+        value = 0
+        for pattern, table in zip(self._patterns, self._tables):
+            value += table[placement_rank(self._positions(tiles, pattern), self._cells)]
+        return value
+
+    def update(self, tiles, value, tile, src, dst):
+        """
+        Adjust an estimate after tile moved from src to dst
+        Only the table of the moved tile's pattern changes
+        Returns an integer
+        """
+        owner = self._owner[tile]
+        if owner is None:
+            return value
+        number, slot = owner
+        table = self._tables[number]
+        self._where[tile] = dst
+        positions = self._positions(tiles, self._patterns[number])
+        after = table[placement_rank(positions, self._cells)]
+        positions[slot] = src
+        return value + after - table[placement_rank(positions, self._cells)]
+
+    def save(self, path):
+        """
+        Write the header and all tables to a file
+        """
+        with open(path, "wb") as stream:
+            stream.write(_HEADER.pack(MAGIC, self._height, self._width, len(self._patterns)))
+            for pattern in self._patterns:
+                stream.write(_NUMBER.pack(len(pattern)))
+                for tile in pattern:
+                    stream.write(_NUMBER.pack(tile))
+            for table in self._tables:
+                stream.write(table)
+
+def build_pattern_database(puzzle_height, puzzle_width, patterns=None):
+    """
+    Build every table of a disjoint pattern partition
+    Defaults to DEFAULT_PATTERNS for the board size
+    Returns a PatternDatabase object
+    """
+    if patterns is None:
+        patterns = DEFAULT_PATTERNS[(puzzle_height, puzzle_width)]
+    tables = [build_table(puzzle_height, puzzle_width, pattern) for pattern in patterns]
+    return PatternDatabase(puzzle_height, puzzle_width, patterns, tables)
+
+def load_pattern_database(path):
+    """
+    Memory-map a file written by PatternDatabase.save
+    The tables are read-only views into the shared page cache
+    Returns a PatternDatabase object
+    """
+    with open(path, "rb") as stream:
+        mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    magic, puzzle_height, puzzle_width, count = _HEADER.unpack_from(view, 0)
+    assert magic == MAGIC, "Not a pattern database file: " + str(path)
+    offset = _HEADER.size
+    patterns = []
+    for dummy_pattern in range(count):
+        (length,) = _NUMBER.unpack_from(view, offset)
+        offset += _NUMBER.size
+        pattern = []
+        for dummy_tile in range(length):
+            pattern.append(_NUMBER.unpack_from(view, offset)[0])
+            offset += _NUMBER.size
+        patterns.append(tuple(pattern))
+    cells = puzzle_height * puzzle_width
+    tables = []
+    for pattern in patterns:
+        size = placement_count(cells, len(pattern))
+        tables.append(view[offset:offset + size])
+        offset += size
+    return PatternDatabase(puzzle_height, puzzle_width, patterns, tables, mapped)
+
+if __name__ == "__main__":
+    #Offline build: python -m fifteen_solver.pattern_db HEIGHT WIDTH PATH
+    build_pattern_database(int(sys.argv[1]), int(sys.argv[2])).save(sys.argv[3])
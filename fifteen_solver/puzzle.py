@@ -0,0 +1,920 @@
+"""
+Loyd's Fifteen puzzle - headless solver core
+Note that solved configuration has the blank (zero) tile in upper left
+This module has no GUI dependency and no import side effects;
+the visualizer lives in fs_mirror.py
+"""
+
+import re
+from array import array
+from operator import eq
+
+from fifteen_solver.endgame import endgame_table
+from fifteen_solver.moves import INVERSE, STEP, compact_moves
+from fifteen_solver.scramble import is_solvable
+
+#Shortest route worth applying as a whole rather than move by move; shorter
+#ones cost more in slicing and stale bookkeeping than stepping them does
+ROUTE_MIN = 32
+
+def _typecode(size):
+    """
+    Pick the smallest array typecode able to hold tile numbers 0..size-1
+    Returns a one-character string
+    """
+    if size <= 1 << 8:
+        return "B"
+    if size <= 1 << 16:
+        return "H"
+    return "L"
+
+def _route_units():
+    """
+    The repeating units of a route: five-move cycles (a step sideways, two
+    steps along a line, a step back and a step against the line, as
+    position_tile builds them) and single moves (straight runs), each with
+    the fewest repeats that make a route at least ROUTE_MIN moves long
+    Returns a list of (unit, repeats) tuples
+    """
+    units = []
+    for along in "lrud":
+        for side in "lrud":
+            if side != along and side != INVERSE[along]:
+                cycle = side + along + along + INVERSE[side] + INVERSE[along]
+                units.append((cycle, -(-ROUTE_MIN // len(cycle))))
+    for direction in "lrud":
+        units.append((direction, ROUTE_MIN))
+    return units
+
+#Shortest instance of every route, to rule routes out with plain substring searches
+_ROUTE_SEEDS = tuple(unit * repeats for unit, repeats in _route_units())
+#Routes as whole repeats of their unit, found with one pattern
+_ROUTES = re.compile("|".join("(?:%s){%d,}" % unit for unit in _route_units()))
+
+def _span(start, count, step):
+    """
+    Slice over count flat indices from start, step apart (step may be negative)
+    Returns a slice
+    """
+    stop = start + count * step
+    return slice(start, stop if stop >= 0 else None, step)
+
+class Puzzle:
+    """
+    Class representation for the Fifteen puzzle
+
+    The board is a flat row-major array of tile numbers, with the blank
+    index and an inverse tile -> index table kept up to date on every move.
+    Long routes (see update_puzzle) shift whole lanes of tiles with slice
+    assignments and then rewrite the table entries of the tiles they moved
+
+    A per-row count of tiles already in their solved cell (the blank
+    aside) is kept up to date too, so the invariant checks only look at
+    the rows and columns they cannot answer from the counts. Routes mark
+    the rows they pass through as stale instead, and a stale row is
+    recounted the next time an invariant needs it
+
+    With checked=False (production mode) the solve_* methods skip their
+    invariant assertions and solve_puzzle skips its final verification
+    """
+
+    __slots__ = ("_height", "_width", "_tiles", "_where", "_zero", "_correct", "_stale", "_checked")
+
+    def __init__(self, puzzle_height, puzzle_width, initial_grid=None, checked=True):
+        """
+        Initialize puzzle with default height and width
+        Returns a Puzzle object
+        """
+        self._height = puzzle_height
+        self._width = puzzle_width
+        self._checked = checked
+        size = puzzle_height * puzzle_width
+        code = _typecode(size)
+        self._tiles = array(code, range(size))
+
+        if initial_grid != None:
+            for row in range(puzzle_height):
+                for col in range(puzzle_width):
+                    self._tiles[row * puzzle_width + col] = initial_grid[row][col]
+        self._index()
+
+    def __str__(self):
+        """
+        Generate string representaion for puzzle
+        Returns a string
+        """
+        ans = ""
+        for row in range(self._height):
+            ans += str(self._tiles[row * self._width:(row + 1) * self._width].tolist())
+            ans += "\n"
+        return ans
+
+    #####################################
+    # GUI methods
+
+    def get_height(self):
+        """
+        Getter for puzzle height
+        Returns an integer
+        """
+        return self._height
+
+    def get_width(self):
+        """
+        Getter for puzzle width
+        Returns an integer
+        """
+        return self._width
+
+    def is_checked(self):
+        """
+        Getter for checked mode
+        Returns a boolean
+        """
+        return self._checked
+
+    def set_checked(self, checked):
+        """
+        Setter for checked mode
+        """
+        self._checked = checked
+
+    def get_number(self, row, col):
+        """
+        Getter for the number at tile position pos
+        Returns an integer
+        """
+        return self._tiles[row * self._width + col]
+
+    def get_tiles(self):
+        """
+        Getter for the whole board in flat row-major order
+        Returns a list of integers
+        """
+        return self._tiles.tolist()
+
+    def get_key(self, rows=None):
+        """
+        Compact hashable encoding of the board, or of its first few rows
+        Returns a tuple of (height, width, bytes)
+        """
+        if rows is None:
+            return (self._height, self._width, self._tiles.tobytes())
+        return (self._height, self._width, self._tiles[:rows * self._width].tobytes())
+
+    def set_number(self, row, col, value):
+        """
+        Setter for the number at tile position pos
+        """
+        index = row * self._width + col
+        self._tiles[index] = value
+        self._where[value] = index
+        if value == 0:
+            self._zero = index
+        #Recounting the row is simpler than tracking what the old tile was
+        self._stale[row] = 1
+
+    @classmethod
+    def from_tiles(cls, puzzle_height, puzzle_width, tiles, checked=True):
+        """
+        Build a puzzle from a flat row-major sequence of tile numbers
+        (any iterable of integers, such as an array or a list)
+        Returns a Puzzle object
+        """
+        new_puzzle = cls.__new__(cls)
+        new_puzzle._height = puzzle_height
+        new_puzzle._width = puzzle_width
+        new_puzzle._checked = checked
+        size = puzzle_height * puzzle_width
+        code = _typecode(size)
+        new_puzzle._tiles = array(code, tiles)
+        assert len(new_puzzle._tiles) == size, "Expected " + str(size) + " tiles"
+        new_puzzle._index()
+        return new_puzzle
+
+    def _index(self):
+        """
+        Build the tile -> index table, the blank index and the per-row
+        counts of solved tiles from the board
+        """
+        tiles = self._tiles
+        width = self._width
+        self._where = array(tiles.typecode, bytes(tiles.itemsize * len(tiles)))
+        self._correct = array(_typecode(width + 1), [0]) * self._height
+        self._stale = bytearray(self._height)
+        for index, value in enumerate(tiles):
+            self._where[value] = index
+            if value == index and value != 0:
+                self._correct[index // width] += 1
+        self._zero = self._where[0]
+
+    def clone(self):
+        """
+        Make a copy of the puzzle to update during solving
+        Returns a Puzzle object
+        """
+        new_puzzle = Puzzle.__new__(Puzzle)
+        new_puzzle._height = self._height
+        new_puzzle._width = self._width
+        new_puzzle._tiles = array(self._tiles.typecode, self._tiles)
+        new_puzzle._where = array(self._where.typecode, self._where)
+        new_puzzle._zero = self._zero
+        new_puzzle._correct = array(self._correct.typecode, self._correct)
+        new_puzzle._stale = bytearray(self._stale)
+        new_puzzle._checked = self._checked
+        return new_puzzle
+
+    ########################################################
+    # Core puzzle methods
+
+    def current_position(self, solved_row, solved_col):
+        """
+        Locate the current position of the tile that will be at
+        position (solved_row, solved_col) when the puzzle is solved
+        Returns a tuple of two integers        
+        """
+        solved_value = (solved_col + self._width * solved_row)
+        assert 0 <= solved_value < len(self._where), "Value " + str(solved_value) + " not found"
+        index = self._where[solved_value]
+        #Only a malformed board (a tile missing, another repeated) fails this
+        assert self._tiles[index] == solved_value, "Value " + str(solved_value) + " not found"
+        return divmod(index, self._width)
+
+    def update_puzzle(self, move_string):
+        """
+        Updates the puzzle state based on the provided move string
+        Long straight runs and repeated cycles are applied as whole routes
+        with slice assignments; everything else goes move by move
+        """
+        #Substring searches are far cheaper than the pattern, so most
+        #move strings never reach it
+        if len(move_string) < ROUTE_MIN:
+            self._step(move_string)
+            return
+        for seed in _ROUTE_SEEDS:
+            if seed in move_string:
+                break
+        else:
+            self._step(move_string)
+            return
+        pending = 0
+        for route in _ROUTES.finditer(move_string):
+            moves = route.group()
+            self._step(move_string[pending:route.start()])
+            if not self._route(moves):
+                #Off the board somewhere: stepping fails at the right move
+                self._step(moves)
+            pending = route.end()
+        self._step(move_string[pending:])
+
+    def _step(self, move_string):
+        """
+        Apply a move string one move at a time
+        """
+        tiles = self._tiles
+        where = self._where
+        correct = self._correct
+        stale = self._stale
+        width = self._width
+        last_row = len(tiles) - width
+        zero = self._zero
+        #Blank bookkeeping is written back even if a move fails its assertion
+        try:
+            for direction in move_string:
+                if direction == "l":
+                    assert zero % width > 0, "move off grid: " + direction
+                    other = zero - 1
+                elif direction == "r":
+                    assert zero % width < width - 1, "move off grid: " + direction
+                    other = zero + 1
+                elif direction == "u":
+                    assert zero >= width, "move off grid: " + direction
+                    other = zero - width
+                elif direction == "d":
+                    assert zero < last_row, "move off grid: " + direction
+                    other = zero + width
+                else:
+                    assert False, "invalid direction: " + direction
+                tile = tiles[other]
+                tiles[zero] = tile
+                where[tile] = zero
+                tiles[other] = 0
+                #Only the moved tile can leave or reach its solved cell;
+                #stale rows are recounted later anyway
+                if tile == other:
+                    if not stale[other // width]:
+                        correct[other // width] -= 1
+                elif tile == zero:
+                    if not stale[zero // width]:
+                        correct[zero // width] += 1
+                zero = other
+        finally:
+            where[0] = zero
+            self._zero = zero
+
+    def _on_board(self, start, direction, count):
+        """
+        Check that a straight line of count steps from a flat index stays on the board
+        Returns a boolean
+        """
+        row, col = divmod(start, self._width)
+        step_row, step_col = STEP[direction]
+        row += step_row * count
+        col += step_col * count
+        return 0 <= row < self._height and 0 <= col < self._width
+
+    def _route(self, moves):
+        """
+        Apply a straight run, or a repeated cycle as matched by _ROUTES,
+        in one go: the tiles it passes are shifted with slice assignments
+        Returns False, changing nothing, if the route leaves the board
+        """
+        tiles = self._tiles
+        width = self._width
+        zero = self._zero
+        blank = array(tiles.typecode, [0])
+        along = moves[1] if moves[0] != moves[1] else moves[0]
+        step = STEP[along][0] * width + STEP[along][1]
+        if moves[0] == along:
+            #Run: every tile on the way moves back one cell behind the blank
+            count = len(moves)
+            if not self._on_board(zero, along, count):
+                return False
+            lanes = [(_span(zero, count + 1, step), tiles[_span(zero + step, count, step)] + blank)]
+        else:
+            #Cycle: the target (one step along) travels count cells, while the
+            #tiles beside it shift back one cell, crossing from lane to lane
+            count = len(moves) // 5
+            side = STEP[moves[0]][0] * width + STEP[moves[0]][1]
+            if not (self._on_board(zero, along, count + 1) and self._on_board(zero, moves[0], 1)
+                    and self._on_board(zero + side, along, count + 1)):
+                return False
+            blank_lane = _span(zero, count + 2, step)
+            side_lane = _span(zero + side, count + 2, step)
+            blanks = tiles[blank_lane]
+            sides = tiles[side_lane]
+            lanes = [(side_lane, sides[1:2] + blanks[2:count + 1] + sides[count + 1:] + blanks[count + 1:]),
+                     (blank_lane, sides[0:1] + sides[2:count + 1] + blank + blanks[1:2])]
+        where = self._where
+        for lane, moved in lanes:
+            tiles[lane] = moved
+            for index, tile in zip(range(lane.start, len(tiles) if step > 0 else -1, step), moved):
+                where[tile] = index
+            first = lane.start // width
+            last = (lane.start + (len(moved) - 1) * step) // width
+            if first > last:
+                first, last = last, first
+            self._stale[first:last + 1] = b"\x01" * (last - first + 1)
+        #Each lane ends its slice with the blank, so where[0] is already right
+        self._zero = zero + count * step
+        return True
+
+    def is_solvable(self):
+        """
+        Check whether the solved configuration can be reached at all
+        Returns a boolean
+        """
+        return is_solvable(self._tiles, self._width)
+
+    ##################################################################
+    # Phase one methods
+
+    def rows_solved_below(self, row):
+        """
+        Check whether every row below the given one is fully solved,
+        from the per-row counts rather than the tiles
+        Returns a boolean
+        """
+        stale = self._stale
+        stale_row = stale.find(1, row + 1)
+        while stale_row != -1:
+            self._recount(stale_row)
+            stale[stale_row] = 0
+            stale_row = stale.find(1, stale_row + 1)
+        return self._correct[row + 1:].count(self._width) == self._height - row - 1
+
+    def _recount(self, row):
+        """
+        Recount the solved tiles of one row from the board
+        """
+        start = row * self._width
+        cells = range(start, start + self._width)
+        solved = sum(map(eq, self._tiles[start:start + self._width], cells))
+        #The blank is never counted, even at home
+        if row == 0 and self._zero == 0:
+            solved -= 1
+        self._correct[row] = solved
+
+    def cells_solved(self, start, stop):
+        """
+        Check whether the flat indices start..stop-1 (none of them 0)
+        hold their own tile numbers
+        Returns a boolean
+        """
+        return self._tiles[start:stop].tolist() == list(range(start, stop))
+
+    def lower_row_invariant(self, target_row, target_col):
+        """
+        Check whether the puzzle satisfies the specified invariant
+        at the given position in the bottom rows of the puzzle (target_row > 1)
+        Returns a boolean
+        """
+        #Check if 0 is in correct place
+        if self._zero != target_row * self._width + target_col:
+            return False
+        #Check if all lower rows are arranged correctly
+        if not self.rows_solved_below(target_row):
+            return False
+        #Check if everything to the right of 0 is correct
+        return self.cells_solved(self._zero + 1, (target_row + 1) * self._width)
+    
+    def transfer_zero(self, soln_string, vert_difference, hor_difference, vert_direction = "up", hor_direction = "none"):
+        """
+        This method will move the zero to where the target is.
+        Returns string of moves by which it does so.
+        """
+        #Each run is built with one repetition rather than a character at a time
+        if vert_direction == "up":
+            soln_string += "u" * vert_difference
+        elif vert_direction == "down":
+            soln_string += "d" * vert_difference
+        if hor_direction == "right":
+            soln_string += "r" * hor_difference
+        elif hor_direction == "left":
+            soln_string += "l" * hor_difference
+        return soln_string
+    
+    def zero_over_target(self, soln_string, vert_space):
+        """
+        This method will resolve situations where zero is directly over the target tile,
+        and both these tiles are in the target column.
+        
+        It will shift the target tile downwards to its destination, 
+        and place the zero on its left.
+        
+        Returns string of moves by which it does so.
+        """
+        soln_string += "lddru" * vert_space #Move target tile directly downwards, one step per cycle
+        #At this point, zero is at position (target_row + 1, target_col).
+        #Thus, we only need to move it left and downwards to fulfill the final assertion.
+        soln_string += "ld"
+        return soln_string
+    
+    def position_tile(self, soln_string, dest_row, dest_col, target_tile_row, target_tile_col):
+        """
+        Moves target tile at (target_tile_row, target_tile_col)
+        to (dest_row, dest_col). 
+        The zero will be on its left, i.e. at (dest_row, dest_col - 1).
+        
+        Returns string of moves by which it does so.
+        """
+        vert_difference = dest_row - target_tile_row
+        
+        #Case 1: Target tile in same column as destination
+        if target_tile_col == dest_col:
+            soln_string = self.transfer_zero(soln_string, vert_difference, 0, "up", "none")
+            #At this point, the target tile has moved one step down because zero has displaced it
+            #Target tile at (target_tile_row + 1, target_tile_col)
+            soln_string = self.zero_over_target(soln_string, vert_difference - 1)
+
+        #Case 2: Target tile in a rightward column
+        elif target_tile_col > dest_col:
+            hor_difference = target_tile_col - dest_col
+            soln_string = self.transfer_zero(soln_string, vert_difference, hor_difference, "up", "right")
+            #At this point, the target tile has moved one step left because zero has displaced it
+            #Target tile at (target_tile_row, target_tile_col - 1)
+            if target_tile_row == 0:
+                soln_string += "dllur" * (hor_difference - 1) #We can mutate row 1 however we like
+                #At this point, the target tile has moved to a position directly above its destination
+                #Target tile at (target_tile_row, target_col)
+                #However, zero is still to its immediate right.
+                soln_string += "dlu"
+                #Now, zero is directly above the target tile, in the same column as its destination.
+                soln_string = self.zero_over_target(soln_string, vert_difference - 1)
+                
+            else:
+                soln_string += "ulldr" * (hor_difference - 1) #AMAP, minimise touching any row below 1.
+                soln_string += "ul"
+                #Now, zero is directly above the target tile, in the same column as its destination.
+                soln_string = self.zero_over_target(soln_string, vert_difference)    
+                
+        #Case 3: Target tile in a leftward column
+        elif target_tile_col < dest_col:
+            hor_difference = dest_col - target_tile_col
+            soln_string = self.transfer_zero(soln_string, vert_difference, hor_difference,"up", "left")
+            #At this point, the target tile has moved one step right because zero has displaced it
+            #Target tile at (target_tile_row, target_tile_col + 1)
+            if target_tile_row == 0:
+                soln_string += "drrul" * (hor_difference - 1) #Move it right
+                soln_string += "dru"
+                #Target tile at (target_tile_row + 1, target_col)
+                #Now, zero is directly above the target tile, in the same column as its destination.
+                soln_string = self.zero_over_target(soln_string, vert_difference - 1)
+        
+            else:
+                soln_string += "urrdl" * (hor_difference - 1) #Avoid touching rows below 1 AMAP.
+                #Special case: if target in same row - Note that hor_difference = 1 is accounted for.
+                #Simply moving the zero left by 1 in transfer_zero will solve this,
+                #And it passes through all conditions here.
+                #At cycle's end, zero remains on target's left, so we don't need to extend string further.
+                #We only extend when the target tile was not on the same row, as below:
+                if target_tile_row != dest_row:
+                    soln_string += "ur"
+                    #Now, zero is directly above the target tile, in the same column as its destination.
+                    soln_string = self.zero_over_target(soln_string, vert_difference)
+        return soln_string
+                
+    def solve_interior_tile(self, target_row, target_col):
+        """
+        Place correct tile at target position
+        Updates puzzle and returns a move string
+        """
+        #Sanity checks
+        if self._checked:
+            assert self.lower_row_invariant(target_row, target_col), "Cannot solve interior tile yet!"
+        
+        soln_string = ""
+        
+        #Find location of target tile and move it to destination
+        (target_tile_row, target_tile_col) = self.current_position(target_row, target_col)         
+        soln_string = self.position_tile(soln_string, target_row, target_col, target_tile_row, target_tile_col)
+        
+        self.update_puzzle(soln_string)
+        
+        #Final checks
+        if self._checked:
+            assert self.lower_row_invariant(target_row, target_col - 1), "Interior solution incorrect!"
+        return soln_string
+
+    def solve_col0_tile(self, target_row):
+        """
+        Solve tile in column zero on specified row (> 1)
+        Updates puzzle and returns a move string
+        """
+        #Sanity checks
+        assert target_row > 1, "Invalid Col0 input!"
+        if self._checked:
+            assert self.lower_row_invariant(target_row, 0), "Cannot solve for Col0 yet!"
+        
+        soln_string = ""
+        
+        #Find location of target tile
+        (target_tile_row, target_tile_col) = self.current_position(target_row, 0)
+        
+        ##At the resolution of each case, we want our target tile to be in its destination.
+        ##We also want our zero tile to be at (target_row - 1, 1).
+        #First edge case: target tile directly above zero tile
+        if target_tile_row == target_row - 1 and target_tile_col == 0: 
+            soln_string += "ur"        
+        #Second edge case: target tile already at (target_row - 1, 1)
+        elif target_tile_row == target_row - 1 and target_tile_col == 1:
+            soln_string += "u"
+            soln_string += "ruldrdlurdluurddlur"
+            #The string above only applies when zero is at (target_row - 1, 0) and 
+            #Target tile is at (target_row - 1, 1), hence the single "u".
+        #Third case: target tile anywhere else
+        else:
+            soln_string += "ur"
+            soln_string = self.position_tile(soln_string, target_row - 1, 1, target_tile_row, target_tile_col)
+            soln_string += "ruldrdlurdluurddlur"
+        #At this point, zero is at (target_row - 1, 1)
+        soln_string = self.transfer_zero(soln_string, 0, self.get_width() - 2, "up", "right")    
+
+        self.update_puzzle(soln_string)
+
+        #Final checks
+        if self._checked:
+            assert self.lower_row_invariant(target_row - 1, self.get_width() - 1), "Col0 solution incorrect!"
+        return soln_string
+
+    def iter_lower_rows(self, stop_row=1):
+        """
+        Solve every row below stop_row (by default, below row 1),
+        starting from any position of zero
+        Updates puzzle as it goes and yields one move string per tile
+        """
+        #Find zero and shift it to the bottom-right corner
+        zero_row, zero_col = self.current_position(0, 0)
+        vert_difference = self._height - 1 - zero_row
+        hor_difference = self._width - 1 - zero_col
+        soln_string = self.transfer_zero("", vert_difference, hor_difference, "down", "right")
+        self.update_puzzle(soln_string)
+        yield soln_string
+        #At this point, zero should be at (height - 1, width - 1)
+        for row in range(self.get_height() - 1, stop_row, -1):
+            for col in range(self.get_width() - 1, -1, -1):
+                if col == 0:
+                    yield self.solve_col0_tile(row)
+                else:
+                    yield self.solve_interior_tile(row, col)
+
+    def solve_lower_rows(self, stop_row=1):
+        """
+        Solve every row below stop_row (see iter_lower_rows)
+        Updates puzzle and returns a move string
+        """
+        return "".join(self.iter_lower_rows(stop_row))
+
+    #############################################################
+    # Phase two methods
+
+    def row0_invariant(self, target_col):
+        """
+        Check whether the puzzle satisfies the row zero invariant
+        at the given column (col > 1)
+        Returns a boolean
+        """
+        width = self._width
+        #Check if 0 is in correct place
+        if self._zero != target_col:
+            return False
+        #Check if all rows with n > 2 are arranged correctly
+        if not self.rows_solved_below(1):
+            return False
+        #Check if the columns to the right of the column containing 0 are correct,
+        #and additionally, if position (1, target_col) is solved
+        return (self.cells_solved(target_col + 1, width)
+                and self.cells_solved(width + target_col, 2 * width))
+
+    def row1_invariant(self, target_col):
+        """
+        Check whether the puzzle satisfies the row one invariant
+        at the given column (col > 1)
+        Returns a boolean
+        """
+        width = self._width
+        #Check if 0 is in correct place
+        if self._zero != width + target_col:
+            return False
+        #Check if all rows with n > 2 are arranged correctly
+        if not self.rows_solved_below(1):
+            return False
+        #Check if the columns to the right of the column containing 0 are correct
+        return (self.cells_solved(target_col + 1, width)
+                and self.cells_solved(width + target_col + 1, 2 * width))
+
+    def solve_row0_tile(self, target_col):
+        """
+        Solve the tile in row zero at the specified column
+        Updates puzzle and returns a move string
+        """
+        #Sanity checks
+        if self._checked:
+            assert self.row0_invariant(target_col), "Cannot solve for Row0 yet!"
+        
+        soln_string = ""
+        
+        #Find location of target tile
+        (target_tile_row, target_tile_col) = self.current_position(0, target_col)
+        
+        ##At the resolution of each case, we want our target tile to be in its destination.
+        ##We also want our zero tile to be at (1, target_col - 1).
+        ##This is also its final position - we don't need to shift it left or right further.
+        #First edge case: target tile left of zero tile
+        if target_tile_row == 0 and target_tile_col == target_col - 1: 
+            soln_string += "ld"        
+        #Second edge case: target tile already in (1, target_col - 1)
+        elif target_tile_row == 1 and target_tile_col == target_col - 1:
+            soln_string += "lld"
+            soln_string += "urdlurrdluldrruld" 
+            #The string above only applies when zero is at (1, target_col - 2) and 
+            #Target tile is at (1, target_col - 1), hence the "lld".
+        #Third case: target tile anywhere else
+        else:
+            soln_string += "ld"
+            soln_string = self.position_tile(soln_string, 1, target_col - 1, target_tile_row, target_tile_col)
+            soln_string += "urdlurrdluldrruld"
+        
+        self.update_puzzle(soln_string)
+        
+        #Final checks
+        if self._checked:
+            assert self.row1_invariant(target_col - 1), "Row0 solution incorrect!"
+        return soln_string
+
+    def solve_row1_tile(self, target_col):
+        """
+        Solve the tile in row one at the specified column
+        Updates puzzle and returns a move string
+        """
+        #Sanity checks
+        if self._checked:
+            assert self.row1_invariant(target_col), "Cannot solve for Row1 yet!"
+        
+        soln_string = ""
+        
+        #Find the target tile and bring it over
+        (target_tile_row, target_tile_col) = self.current_position(1, target_col)
+        soln_string = self.position_tile(soln_string, 1, target_col, target_tile_row, target_tile_col)
+        
+        #At this point, 0 is to the left of the target, so we need to put it above the target
+        soln_string += "ur"
+        
+        self.update_puzzle(soln_string)
+        
+        #Final checks
+        if self._checked:
+            assert self.row0_invariant(target_col), "Row1 solution incorrect!"
+        return soln_string                        
+
+    def iter_top_rows(self, stop_col=1):
+        """
+        Solve rows 0 and 1 right to left, for every column right of stop_col
+        (by default, down to the upper left 2x2)
+        Updates puzzle as it goes and yields one move string per tile
+        """
+        for col in range(self.get_width() - 1, stop_col, -1):
+            yield self.solve_row1_tile(col)
+            yield self.solve_row0_tile(col)
+
+    def solve_top_rows(self, stop_col=1):
+        """
+        Solve rows 0 and 1 right of stop_col (see iter_top_rows)
+        Updates puzzle and returns a move string
+        """
+        return "".join(self.iter_top_rows(stop_col))
+
+    ###########################################################
+    # Phase 3 methods
+
+    def solve_2x2(self):
+        """
+        Solve the upper left 2x2 part of the puzzle
+        Updates the puzzle and returns a move string
+        """
+        #Sanity checks
+        if self._checked:
+            assert self.row1_invariant(1), "Cannot solve 2x2 yet!"
+        
+        soln_string = ""
+        
+        #Assuming the puzzle is solvable, our cases will depend on where the (1,1) tile is
+        #Because solvable 2x2 puzzles are cyclic with period "druldruldrul", and knowing that
+        #we solve these only when 0 is at (1,1), there are three possible positions:
+        #dr(1)uldr(2)uldr(3)ul where zero is at (1,1). This is the basis of this approach.
+        (target_tile_row, target_tile_col) = self.current_position(1, 1)
+        if target_tile_row == 0 and target_tile_col == 1:
+            soln_string += "ul"
+        elif target_tile_row == 1 and target_tile_col == 0:
+            soln_string += "lu"
+        else:
+            soln_string += "uldrul"
+        
+        self.update_puzzle(soln_string)
+        
+        #Final checks
+        if self._checked:
+            assert self.row0_invariant(0), "2x2 solution incorrect!"
+        return soln_string   
+        
+    def endgame_block(self):
+        """
+        Shape of the block left for an endgame table lookup: 2x3 on boards
+        at least 3 wide, 3x2 on 2-wide boards at least 3 high
+        Returns a (height, width) tuple, or None for 2x2 boards
+        """
+        if self._width > 2:
+            return (2, 3)
+        if self._height > 2:
+            return (3, 2)
+        return None
+
+    def block_invariant(self, block_height, block_width):
+        """
+        Check whether zero is in the upper left block of the given size
+        and every tile outside that block is solved
+        Returns a boolean
+        """
+        zero_row, zero_col = self.current_position(0, 0)
+        if zero_row >= block_height or zero_col >= block_width:
+            return False
+        if not self.rows_solved_below(block_height - 1):
+            return False
+        for row_number in range(block_height):
+            start = row_number * self._width
+            if not self.cells_solved(start + block_width, start + self._width):
+                return False
+        return True
+
+    def solve_endgame(self, block_height, block_width):
+        """
+        Solve the upper left block (2x3 or 3x2) optimally with one lookup
+        in a precomputed endgame table
+        Updates the puzzle and returns a move string
+        """
+        #Sanity checks
+        if self._checked:
+            assert self.block_invariant(block_height, block_width), "Cannot solve endgame yet!"
+
+        #Renumber the block's tiles as if it were a board of its own
+        tiles = []
+        for row in range(block_height):
+            for col in range(block_width):
+                value_row, value_col = divmod(self.get_number(row, col), self._width)
+                tiles.append(value_row * block_width + value_col)
+        soln_string = endgame_table(block_height, block_width).solve_tiles(tiles)
+
+        self.update_puzzle(soln_string)
+
+        #Final checks
+        if self._checked:
+            assert self.row0_invariant(0), "Endgame solution incorrect!"
+        return soln_string
+
+    def iter_final_rows(self, block=None):
+        """
+        Solve everything left once solve_lower_rows has run: with a block
+        shape (see endgame_block), the top rows down to that block and then
+        the block by table lookup; without one, phase two and solve_2x2
+        Updates the puzzle as it goes and yields move strings
+        """
+        if block is None:
+            yield from self.iter_top_rows()
+            yield self.solve_2x2()
+            return
+        block_height, block_width = block
+        yield from self.iter_top_rows(block_width - 1)
+        yield self.solve_endgame(block_height, block_width)
+
+    def solve_final_rows(self, block=None):
+        """
+        Solve everything left once solve_lower_rows has run (see iter_final_rows)
+        Updates the puzzle and returns a move string
+        """
+        return "".join(self.iter_final_rows(block))
+
+    def phase_plan(self, endgame=True):
+        """
+        Where a solve hands over from solve_lower_rows to solve_final_rows:
+        the stop_row for the former and the block shape for the latter
+        (see endgame_block; None finishes with the 2x2 macros)
+        Returns a (stop_row, block) tuple
+        """
+        block = self.endgame_block() if endgame else None
+        if block is None:
+            return 1, None
+        return block[0] - 1, block
+
+    def iter_solution(self, endgame=True):
+        """
+        Generate a solution for a puzzle in chunks, one per tile (or block),
+        so very large solutions never have to exist as a single string
+        In checked mode every chunk is also replayed on a copy of the
+        starting board, which must end up solved
+        Raises ValueError if the puzzle is not solvable
+        Updates the puzzle as chunks are produced and yields move strings
+        """
+        #If puzzle is solved, that's that
+        if self.row0_invariant(0):
+            return
+        #Reject boards with the wrong parity before doing any work
+        if not self.is_solvable():
+            raise ValueError("Puzzle is not solvable")
+        if self._checked:
+            start = self.clone()
+        stop_row, block = self.phase_plan(endgame)
+        for chunks in (self.iter_lower_rows(stop_row), self.iter_final_rows(block)):
+            for soln_string in chunks:
+                if self._checked:
+                    start.update_puzzle(soln_string)
+                yield soln_string
+        if self._checked:
+            assert start.row0_invariant(0), "Puzzle solution incorrect!"
+
+    def write_solution(self, sink, endgame=True):
+        """
+        Stream a solution into a file-like object with a write method
+        Updates the puzzle and returns the number of moves written
+        """
+        written = 0
+        for soln_string in self.iter_solution(endgame):
+            sink.write(soln_string)
+            written += len(soln_string)
+        return written
+
+    def solve_puzzle(self, compact=False, window=0, endgame=True):
+        """
+        Generate a solution string for a puzzle
+        With compact, inverse move pairs are cancelled afterwards, and with
+        window > 0 windows of up to that many moves are also replaced by
+        shorter equivalents (see fifteen_solver.moves)
+        With endgame, the last 2x3 (or 3x2) block is finished optimally by
+        table lookup instead of the row0/row1 and 2x2 macros
+        Raises ValueError if the puzzle is not solvable
+        Updates the puzzle and returns a move string
+        """
+        #iter_solution verifies its own chunks in checked mode; compaction
+        #rewrites them, so a compacted string is verified again from a copy
+        if compact and self._checked:
+            start = self.clone()
+        zero_row, zero_col = self.current_position(0, 0)
+        soln_string = "".join(self.iter_solution(endgame))
+        if compact:
+            soln_string = compact_moves(soln_string, self._height, self._width,
+                                        zero_row, zero_col, window)
+            if self._checked:
+                start.update_puzzle(soln_string)
+                assert start.row0_invariant(0), "Puzzle solution incorrect!"
+        return soln_string
+
+
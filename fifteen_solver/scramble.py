@@ -0,0 +1,67 @@
+"""
+Solvability test and random solvable boards
+
+A board (at least 2x2) can reach the blank-at-(0,0) goal exactly when the
+parity of its permutation (blank included) equals the parity of the
+blank's distance from (0, 0): every move is one transposition and moves
+the blank by one cell
+"""
+
+import random
+
+def permutation_parity(tiles):
+    """
+    Parity of a permutation of 0..n-1, from its cycle decomposition
+    Returns 0 for even, 1 for odd
+    """
+    size = len(tiles)
+    seen = bytearray(size)
+    parity = 0
+    for start in range(size):
+        if seen[start]:
+            continue
+        length = 0
+        index = start
+        while not seen[index]:
+            seen[index] = 1
+            index = tiles[index]
+            length += 1
+        #A cycle of length k is k - 1 transpositions
+        parity ^= (length - 1) & 1
+    return parity
+
+def is_solvable(tiles, puzzle_width):
+    """
+    Check a flat row-major board holds each tile once and can be solved
+    Returns a boolean
+    """
+    if sorted(tiles) != list(range(len(tiles))):
+        return False
+    zero_row, zero_col = divmod(list(tiles).index(0), puzzle_width)
+    return permutation_parity(tiles) == (zero_row + zero_col) & 1
+
+def random_grid(puzzle_height, puzzle_width, rng=random):
+    """
+    Draw a board uniformly from all solvable boards of the given size
+    Returns a list of rows
+    """
+    assert puzzle_height > 1 and puzzle_width > 1, "Board must be at least 2x2"
+    size = puzzle_height * puzzle_width
+    tiles = list(range(size))
+    rng.shuffle(tiles)
+    zero = tiles.index(0)
+    if permutation_parity(tiles) != (zero // puzzle_width + zero % puzzle_width) & 1:
+        #Swapping two tiles pairs every unsolvable board with a solvable one,
+        #so the result stays uniform
+        first, second = [index for index in range(3) if index != zero][:2]
+        tiles[first], tiles[second] = tiles[second], tiles[first]
+    return [tiles[row * puzzle_width:(row + 1) * puzzle_width] for row in range(puzzle_height)]
+
+def random_grids(puzzle_height, puzzle_width, count, seed=None):
+    """
+    Reproducible stream of random solvable boards for load testing
+    Yields lists of rows
+    """
+    rng = random.Random(seed)
+    for dummy_board in range(count):
+        yield random_grid(puzzle_height, puzzle_width, rng)
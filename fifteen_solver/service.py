@@ -0,0 +1,330 @@
+"""
+Local solving service: JSON lines over TCP or a Unix socket
+
+Each request is one JSON object per line,
+    {"id": 7, "grid": [[...], ...], "timeout": 0.5, "solver": "auto"}
+and gets one JSON line back,
+    {"id": 7, "moves": "...", "solver": "optimal", "seconds": 0.12}
+or {"id": 7, "error": "..."}. Responses may come back out of order.
+
+Solves run on process pools, so the event loop only parses and routes.
+Identical boards already in flight (same grid and solver) share one solve,
+as long as it runs at least until the new request's deadline.
+With solver "auto", every board is first solved by the fast phase-based
+solve_puzzle, and small boards (up to OPTIMAL_MAX_CELLS, or the size of
+the pattern database the service was started with) are then tried with
+the optimal IDA* solver when the deadline leaves room for it; the
+optimal answer replaces the fast one only if it arrives in time. Fast
+solves have a pool of their own, so optimal attempts that hold their
+workers until the deadline never queue them up.
+
+    python -m fifteen_solver.service --port 8765
+    python -m fifteen_solver.service --unix /tmp/fifteen.sock
+    python -m fifteen_solver.service --pattern-db fifteen-663.pdb
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fifteen_solver.optimal import solve_optimal
+from fifteen_solver.pattern_db import load_pattern_database
+from fifteen_solver.puzzle import Puzzle
+
+SOLVERS = ("auto", "fast", "optimal")
+
+#Largest board (in cells) the optimal solver is tried on without a pattern
+#database; 4x4 IDA* on Manhattan distance alone takes tens of seconds
+OPTIMAL_MAX_CELLS = 9
+#Time kept back from the optimal attempt to send the fast answer, in seconds
+FAST_RESERVE = 0.05
+#Shortest deadline that is still worth an optimal attempt, in seconds
+OPTIMAL_MIN_SECONDS = 0.2
+#Deadline for requests that do not give one, in seconds
+DEFAULT_TIMEOUT = 10.0
+#Longest request line, in bytes; asyncio's 64 KiB default stops short of 120x120 boards
+LINE_LIMIT = 1 << 24
+
+def _solve_fast(grid):
+    """
+    Worker entry point: phase-based solve in production mode
+    Returns a move string
+    """
+    puzzle = Puzzle(len(grid), len(grid[0]), grid, False)
+    return puzzle.solve_puzzle()
+
+#Pattern databases loaded by this worker process, by path
+_DATABASES = {}
+
+def _solve_optimal(grid, deadline, pattern_path=None):
+    """
+    Worker entry point: IDA* solve that gives up at the deadline (a
+    time.monotonic() value, shared by every process on the machine), so an
+    abandoned attempt never keeps a worker busy, even after waiting in the queue
+    With pattern_path, the pattern database there is the heuristic; each
+    worker maps it once and keeps it for later solves
+    Returns a move string, or None if the deadline passed
+    """
+    heuristic = None
+    if pattern_path is not None:
+        heuristic = _DATABASES.get(pattern_path)
+        if heuristic is None:
+            heuristic = _DATABASES[pattern_path] = load_pattern_database(pattern_path)
+    puzzle = Puzzle(len(grid), len(grid[0]), grid, False)
+    try:
+        return solve_optimal(puzzle, heuristic, deadline)
+    except TimeoutError:
+        return None
+
+async def read_request(reader):
+    """
+    Read one request line; a line longer than the reader's limit is
+    skipped up to its end
+    Returns bytes (empty at the end of the stream), or None for a skipped line
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as error:
+        return error.partial
+    except asyncio.LimitOverrunError as error:
+        consumed = error.consumed
+    while True:
+        await reader.readexactly(consumed)
+        try:
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as error:
+            consumed = error.consumed
+
+def board_key(grid):
+    """
+    Hashable form of a grid, used to coalesce identical requests
+    Returns a tuple of tuples
+    """
+    return tuple(tuple(row) for row in grid)
+
+class SolveService:
+    """
+    Dispatches solves to process pools (one for fast solves, one for
+    optimal attempts), coalescing identical boards in flight and enforcing
+    per-request deadlines
+    """
+
+    def __init__(self, workers=None, pattern_path=None):
+        """
+        Create a service with its own process pools, each of workers processes
+        With pattern_path (a file written by PatternDatabase.save), boards of
+        the database's size are also tried with the optimal solver
+        Returns a SolveService object
+        """
+        workers = workers or os.cpu_count() or 1
+        self._pattern_path = pattern_path
+        self._pattern_size = None
+        if pattern_path is not None:
+            database = load_pattern_database(pattern_path)
+            self._pattern_size = (database.get_height(), database.get_width())
+        self._fast_executor = ProcessPoolExecutor(max_workers=workers)
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._in_flight = {}
+        self._coalesced = 0
+        self._solved = {solver: 0 for solver in SOLVERS[1:]}
+
+    def close(self):
+        """
+        Shut down the process pools
+        """
+        self._fast_executor.shutdown(wait=False, cancel_futures=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """
+        Snapshot of the service counters
+        Returns a dictionary
+        """
+        return {"in_flight": len(self._in_flight),
+                "coalesced": self._coalesced,
+                "solved": dict(self._solved)}
+
+    async def _run(self, executor, function, *args):
+        """
+        Run a worker entry point on one of the pools
+        Returns its result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, function, *args)
+
+    async def _solve(self, grid, solver, deadline):
+        """
+        Pick and run a solver for one board within the deadline
+        (a time.monotonic() value)
+        Returns a (move string, solver used) tuple
+        """
+        pattern_path = None
+        if (len(grid), len(grid[0])) == self._pattern_size:
+            pattern_path = self._pattern_path
+        small = pattern_path is not None or len(grid) * len(grid[0]) <= OPTIMAL_MAX_CELLS
+        if solver == "optimal" and small:
+            soln_string = await self._run(self._executor, _solve_optimal, grid, deadline,
+                                          pattern_path)
+            if soln_string is None:
+                raise asyncio.TimeoutError()
+            self._solved["optimal"] += 1
+            return soln_string, "optimal"
+        #The fast answer comes first, so "auto" always has one to fall back on
+        soln_string = await self._run(self._fast_executor, _solve_fast, grid)
+        budget = deadline - time.monotonic() - FAST_RESERVE
+        if solver == "auto" and small and budget >= OPTIMAL_MIN_SECONDS:
+            try:
+                #Also bounds the wait for a worker if optimal attempts are queued up
+                optimal = await asyncio.wait_for(
+                    self._run(self._executor, _solve_optimal, grid, deadline - FAST_RESERVE,
+                              pattern_path),
+                    budget)
+            except asyncio.TimeoutError:
+                optimal = None
+            if optimal is not None:
+                self._solved["optimal"] += 1
+                return optimal, "optimal"
+        self._solved["fast"] += 1
+        return soln_string, "fast"
+
+    def _forget(self, key, task):
+        """
+        Drop a finished solve from the in-flight table, unless a later one
+        has already replaced it
+        """
+        #Its callers may all have timed out, so nobody else collects the error
+        if not task.cancelled():
+            task.exception()
+        if self._in_flight.get(key, (None, None))[0] is task:
+            del self._in_flight[key]
+
+    async def solve(self, grid, timeout=DEFAULT_TIMEOUT, solver="auto"):
+        """
+        Solve a grid (a list of rows), sharing the work with any identical
+        request already in flight
+        Raises asyncio.TimeoutError if no answer arrives within timeout seconds
+        Returns a (move string, solver used) tuple
+        """
+        assert solver in SOLVERS, "Unknown solver: " + str(solver)
+        key = (solver, board_key(grid))
+        deadline = time.monotonic() + timeout
+        task, until = self._in_flight.get(key, (None, None))
+        #A solve that stops earlier would cut this request short, except that
+        #fast solves never look at the deadline
+        if task is None or (solver != "fast" and until < deadline):
+            task = asyncio.ensure_future(self._solve(grid, solver, deadline))
+            self._in_flight[key] = (task, deadline)
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._coalesced += 1
+        #Shielded, so one caller timing out does not cancel the others' solve
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+
+    async def handle_line(self, line):
+        """
+        Answer one JSON request line
+        Returns a dictionary ready to be sent back
+        """
+        start = time.perf_counter()
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            return {"id": None, "error": "invalid JSON: " + str(error)}
+        if not isinstance(request, dict):
+            return {"id": None, "error": "a request must be a JSON object"}
+        reply = {"id": request.get("id")}
+        grid = request.get("grid")
+        solver = request.get("solver", "auto")
+        timeout = request.get("timeout")
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        if not grid or not isinstance(grid, list) or solver not in SOLVERS:
+            reply["error"] = "a request needs a grid and a solver in " + ", ".join(SOLVERS)
+            return reply
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)):
+            reply["error"] = "timeout must be a number of seconds"
+            return reply
+        try:
+            soln_string, used = await self.solve(grid, timeout, solver)
+        except asyncio.TimeoutError:
+            reply["error"] = "timed out"
+        except Exception as error:
+            #Whatever the board did to the solver, the client still gets a reply
+            reply["error"] = "cannot solve: %s: %s" % (type(error).__name__, error)
+        else:
+            reply["moves"] = soln_string
+            reply["solver"] = used
+        reply["seconds"] = time.perf_counter() - start
+        return reply
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve one client: every line is answered as soon as its solve
+        finishes, so slow boards do not hold up fast ones
+        """
+        lock = asyncio.Lock()
+        pending = set()
+
+        async def answer(line):
+            """
+            Solve one request and write its reply line
+            """
+            if line is None:
+                reply = {"id": None, "error": "request line longer than %d bytes" % LINE_LIMIT}
+            else:
+                reply = await self.handle_line(line)
+            async with lock:
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                line = await read_request(reader)
+                if line is not None and not line:
+                    break
+                if line is not None and not line.strip():
+                    continue
+                task = asyncio.create_task(answer(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+
+async def serve(host="127.0.0.1", port=8765, path=None, workers=None, pattern_path=None):
+    """
+    Run the service on a TCP port, or on a Unix socket if path is given,
+    until cancelled
+    """
+    service = SolveService(workers, pattern_path)
+    if path is not None:
+        server = await asyncio.start_unix_server(service.handle_connection, path,
+                                                 limit=LINE_LIMIT)
+    else:
+        server = await asyncio.start_server(service.handle_connection, host, port,
+                                            limit=LINE_LIMIT)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description="JSON-lines solving service")
+    PARSER.add_argument("--host", default="127.0.0.1")
+    PARSER.add_argument("--port", type=int, default=8765)
+    PARSER.add_argument("--unix", help="serve on this Unix socket path instead of TCP")
+    PARSER.add_argument("--workers", type=int)
+    PARSER.add_argument("--pattern-db", help="pattern database for optimal solves of its board size")
+    ARGS = PARSER.parse_args()
+    try:
+        asyncio.run(serve(ARGS.host, ARGS.port, ARGS.unix, ARGS.workers, ARGS.pattern_db))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,152 @@
+"""
+NumPy engine for applying and checking move strings on many boards at once
+N boards of one size are held as an (N, height * width) array; every move
+is applied to all of them with a single gather/scatter through a
+precomputed (blank index, direction) -> neighbour index table
+
+NumPy is an optional dependency: only this module needs it
+"""
+
+import numpy as np
+
+#Direction codes; padding keeps the blank where it is
+CODES = {"l": 0, "r": 1, "u": 2, "d": 3}
+PAD = 4
+INVALID = 5
+
+#Columns of move codes decoded per step of apply_moves
+BLOCK = 4096
+
+def _code_lookup():
+    """
+    Byte -> direction code table for decoding ASCII move strings
+    Returns a uint8 array of length 256
+    """
+    lookup = np.full(256, INVALID, dtype=np.uint8)
+    for direction, code in CODES.items():
+        lookup[ord(direction)] = code
+    return lookup
+
+_LOOKUP = _code_lookup()
+
+def swap_table(puzzle_height, puzzle_width):
+    """
+    For every blank index and direction code, the index the blank moves to
+    Off-grid moves and invalid characters map to -1, padding to the blank itself
+    Returns an integer array of shape (height * width, 6)
+    """
+    cells = puzzle_height * puzzle_width
+    table = np.full((cells, INVALID + 1), -1, dtype=np.int64)
+    for index in range(cells):
+        row, col = divmod(index, puzzle_width)
+        if col > 0:
+            table[index, CODES["l"]] = index - 1
+        if col < puzzle_width - 1:
+            table[index, CODES["r"]] = index + 1
+        if row > 0:
+            table[index, CODES["u"]] = index - puzzle_width
+        if row < puzzle_height - 1:
+            table[index, CODES["d"]] = index + puzzle_width
+        table[index, PAD] = index
+    return table
+
+def encode_moves(move_strings, start=0, stop=None):
+    """
+    Decode the [start, stop) slice of each move string into direction codes,
+    padding shorter strings; characters that are not moves, non-ASCII
+    ones included, become INVALID
+    Returns a uint8 array of shape (len(move_strings), stop - start)
+    """
+    if stop is None:
+        stop = max([len(move_string) for move_string in move_strings] + [start])
+    codes = np.full((len(move_strings), stop - start), PAD, dtype=np.uint8)
+    for number, move_string in enumerate(move_strings):
+        #Anything outside ASCII becomes a single "?", which decodes to INVALID
+        chunk = move_string[start:stop].encode("ascii", "replace")
+        if chunk:
+            codes[number, :len(chunk)] = _LOOKUP[np.frombuffer(chunk, dtype=np.uint8)]
+    return codes
+
+class BoardBatch:
+    """
+    Many boards of one size, updated together
+    """
+
+    def __init__(self, puzzle_height, puzzle_width, grids):
+        """
+        Load boards given as an (N, height, width) or (N, height * width)
+        array-like of tile numbers
+        Returns a BoardBatch object
+        """
+        cells = puzzle_height * puzzle_width
+        dtype = np.uint8 if cells <= 1 << 8 else np.uint16 if cells <= 1 << 16 else np.uint32
+        self._height = puzzle_height
+        self._width = puzzle_width
+        self._boards = np.array(grids, dtype=dtype).reshape(-1, cells)
+        self._rows = np.arange(len(self._boards))
+        self._zeros = np.argmin(self._boards, axis=1)
+        self._valid = np.ones(len(self._boards), dtype=bool)
+        self._table = swap_table(puzzle_height, puzzle_width)
+        self._goal = np.arange(cells, dtype=dtype)
+
+    def get_boards(self):
+        """
+        Getter for the boards, one flat row-major board per row
+        Returns an (N, height * width) array
+        """
+        return self._boards
+
+    def get_valid(self):
+        """
+        Getter for which boards have only seen legal moves so far
+        Boards that hit an illegal move stop moving
+        Returns a boolean array
+        """
+        return self._valid
+
+    def _step(self, codes):
+        """
+        Apply one move per board (a scalar code or an array of N codes)
+        """
+        targets = self._table[self._zeros, codes]
+        #Illegal moves invalidate the board and leave it where it is
+        illegal = targets < 0
+        if illegal.any():
+            self._valid &= ~illegal
+        targets = np.where(self._valid, targets, self._zeros)
+        rows = self._rows
+        self._boards[rows, self._zeros] = self._boards[rows, targets]
+        self._boards[rows, targets] = 0
+        self._zeros = targets
+
+    def apply_moves(self, move_strings):
+        """
+        Apply one move string to every board, or one string per board
+        """
+        if isinstance(move_strings, str):
+            for code in encode_moves([move_strings])[0]:
+                self._step(code)
+            return
+        assert len(move_strings) == len(self._boards), "Need one move string per board"
+        longest = max([len(move_string) for move_string in move_strings] + [0])
+        for start in range(0, longest, BLOCK):
+            codes = encode_moves(move_strings, start, min(start + BLOCK, longest))
+            for column in range(codes.shape[1]):
+                self._step(codes[:, column])
+
+    def solved(self):
+        """
+        Vectorized form of Puzzle.row0_invariant(0): blank at (0, 0) and
+        every tile in place, for boards that only saw legal moves
+        Returns a boolean array
+        """
+        return (self._boards == self._goal).all(axis=1) & self._valid
+
+def verify_solutions(puzzle_height, puzzle_width, grids, move_strings):
+    """
+    Replay one move string per grid and check that each ends up solved
+    Returns a boolean array
+    """
+    batch = BoardBatch(puzzle_height, puzzle_width, grids)
+    batch.apply_moves(move_strings)
+    return batch.solved()
@@ -0,0 +1,64 @@
+"""
+Solution archives: packed move round trips and dump/load of boards whose
+tiles are stored one and two bytes wide
+"""
+
+import random
+
+import pytest
+
+from fifteen_solver.archive import dump, load, pack_moves, packed_size, unpack_moves
+from fifteen_solver.puzzle import Puzzle
+from fifteen_solver.scramble import random_grids
+
+@pytest.mark.parametrize("move_count", [0, 1, 2, 3, 4, 5, 100003])
+def test_pack_round_trip(move_count):
+    rng = random.Random(move_count)
+    move_string = "".join(rng.choice("lrud") for dummy_move in range(move_count))
+    packed = pack_moves(move_string)
+    assert len(packed) == packed_size(move_count)
+    assert unpack_moves(packed, move_count) == move_string
+    #Padding must not leak into a shorter prefix
+    assert unpack_moves(memoryview(packed), move_count // 2) == move_string[:move_count // 2]
+
+#16x16 is the largest board with one-byte tiles, 17x17 the smallest with two
+@pytest.mark.parametrize("puzzle_height, puzzle_width, itemsize",
+                         [(3, 3, 1), (16, 16, 1), (17, 17, 2), (5, 60, 2)])
+def test_dump_and_load(tmp_path, puzzle_height, puzzle_width, itemsize):
+    path = str(tmp_path / "solutions.fsa")
+    grids = list(random_grids(puzzle_height, puzzle_width, 3, puzzle_width))
+    puzzles = [Puzzle(puzzle_height, puzzle_width, grid) for grid in grids]
+    pairs = [(puzzle.clone(), puzzle.solve_puzzle()) for puzzle in puzzles]
+    #Lists of rows are accepted as well as puzzles
+    pairs.append((grids[0], pairs[0][1]))
+    assert dump(path, pairs) == len(pairs)
+    with load(path) as archive:
+        assert len(archive) == len(pairs)
+        for record, (board, move_string) in zip(archive, pairs):
+            assert record.tiles().itemsize == itemsize
+            assert record.get_move_count() == len(move_string)
+            assert record.moves() == move_string
+            puzzle = record.puzzle()
+            assert (puzzle.get_height(), puzzle.get_width()) == (puzzle_height, puzzle_width)
+            puzzle.update_puzzle(record.moves())
+            assert puzzle.row0_invariant(0)
+        #Random access matches the file order, backwards too
+        for index in range(len(pairs) - 1, -1, -1):
+            assert archive[index].moves() == pairs[index][1]
+        assert list(archive[-1].tiles()) == [value for row in grids[0] for value in row]
+
+def test_close_releases_the_mapping(tmp_path):
+    path = str(tmp_path / "solutions.fsa")
+    puzzle = Puzzle(3, 3, next(random_grids(3, 3, 1, 1)))
+    dump(path, [(puzzle.clone(), puzzle.solve_puzzle())])
+    archive = load(path)
+    record = archive[0]
+    packed = record.packed_moves()
+    #A view handed out by packed_moves keeps the mapping open
+    with pytest.raises(BufferError):
+        archive.close()
+    packed.release()
+    archive.close()
+    archive.close()
+    with pytest.raises(ValueError):
+        record.moves()
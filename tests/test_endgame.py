@@ -0,0 +1,63 @@
+"""
+Endgame tables against an independent breadth-first search: every
+solvable 2x3 and 3x2 block must get a solution of exactly its distance
+"""
+
+from itertools import permutations
+
+import pytest
+
+from fifteen_solver.endgame import EndgameTable, endgame_table
+from fifteen_solver.moves import STEP
+
+def distances(block_height, block_width):
+    """
+    Fewest moves from every reachable arrangement to the solved block
+    """
+    goal = tuple(range(block_height * block_width))
+    found = {goal: 0}
+    frontier = [goal]
+    while frontier:
+        following = []
+        for tiles in frontier:
+            row, col = divmod(tiles.index(0), block_width)
+            for step_row, step_col in STEP.values():
+                if 0 <= row + step_row < block_height and 0 <= col + step_col < block_width:
+                    moved = list(tiles)
+                    other = (row + step_row) * block_width + col + step_col
+                    moved[row * block_width + col], moved[other] = moved[other], 0
+                    moved = tuple(moved)
+                    if moved not in found:
+                        found[moved] = found[tiles] + 1
+                        following.append(moved)
+        frontier = following
+    return found
+
+def replay(tiles, block_width, move_string):
+    tiles = list(tiles)
+    zero = tiles.index(0)
+    for direction in move_string:
+        other = zero + STEP[direction][0] * block_width + STEP[direction][1]
+        tiles[zero], tiles[other] = tiles[other], 0
+        zero = other
+    return tiles
+
+@pytest.mark.parametrize("block_height, block_width", [(2, 3), (3, 2)])
+def test_every_block_is_solved_optimally(block_height, block_width):
+    table = EndgameTable(block_height, block_width)
+    expected = distances(block_height, block_width)
+    size = block_height * block_width
+    #Half of all arrangements have the wrong parity
+    assert len(expected) * 2 == len(list(permutations(range(size))))
+    for tiles in permutations(range(size)):
+        if tiles not in expected:
+            with pytest.raises(AssertionError, match="not solvable"):
+                table.solve_tiles(tiles)
+            continue
+        soln_string = table.solve_tiles(tiles)
+        assert len(soln_string) == expected[tiles]
+        assert replay(tiles, block_width, soln_string) == list(range(size))
+
+def test_tables_are_shared():
+    assert endgame_table(2, 3) is endgame_table(2, 3)
+    assert endgame_table(2, 3) is not endgame_table(3, 2)
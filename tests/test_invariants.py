@@ -0,0 +1,103 @@
+"""
+The invariant checks against a brute-force rescan of the whole board
+
+The checks answer from per-row solved counts, which moves, routes and
+set_number keep up to date (or mark stale), so every test replays
+random solves in uneven pieces and compares the answers after each one.
+"""
+
+import random
+
+import pytest
+
+from fifteen_solver.moves import INVERSE
+from fifteen_solver.puzzle import Puzzle
+from fifteen_solver.scramble import random_grids
+
+SIZES = ((4, 4), (5, 7), (7, 5), (12, 40))
+
+def solved_from(tiles, start, stop):
+    """
+    Whether every cell in range(start, stop) holds its own number
+    """
+    return all(tiles[index] == index for index in range(start, stop))
+
+def brute_lower_row(tiles, width, target_row, target_col):
+    index = target_row * width + target_col
+    return tiles[index] == 0 and solved_from(tiles, index + 1, len(tiles))
+
+def brute_row0(tiles, width, target_col):
+    return (tiles[target_col] == 0 and solved_from(tiles, 2 * width, len(tiles))
+            and solved_from(tiles, target_col + 1, width)
+            and solved_from(tiles, width + target_col, 2 * width))
+
+def brute_row1(tiles, width, target_col):
+    return (tiles[width + target_col] == 0 and solved_from(tiles, 2 * width, len(tiles))
+            and solved_from(tiles, target_col + 1, width)
+            and solved_from(tiles, width + target_col + 1, 2 * width))
+
+def assert_invariants(puzzle, rng):
+    """
+    Compare every invariant at the blank's cell, where it can hold, and at
+    a few random cells, where it usually cannot
+    """
+    height, width = puzzle.get_height(), puzzle.get_width()
+    tiles = puzzle.get_tiles()
+    cells = [divmod(tiles.index(0), width)]
+    cells += [(rng.randrange(height), rng.randrange(width)) for dummy_cell in range(3)]
+    for row, col in cells:
+        if row > 1:
+            assert (puzzle.lower_row_invariant(row, col)
+                    == brute_lower_row(tiles, width, row, col))
+        assert puzzle.row0_invariant(col) == brute_row0(tiles, width, col)
+        assert puzzle.row1_invariant(col) == brute_row1(tiles, width, col)
+
+def replay(puzzle, soln_string, rng):
+    """
+    Apply a solution in random pieces, checking the invariants after each
+    """
+    start = 0
+    while start < len(soln_string):
+        stop = start + rng.choice((1, 2, 5, 40, 300))
+        puzzle.update_puzzle(soln_string[start:stop])
+        assert_invariants(puzzle, rng)
+        start = stop
+
+@pytest.mark.parametrize("puzzle_height, puzzle_width", SIZES)
+def test_invariants_while_replaying_solves(puzzle_height, puzzle_width):
+    rng = random.Random(puzzle_height * 100 + puzzle_width)
+    for grid in random_grids(puzzle_height, puzzle_width, 4, puzzle_width):
+        soln_string = Puzzle(puzzle_height, puzzle_width, grid, checked=False).solve_puzzle()
+        puzzle = Puzzle(puzzle_height, puzzle_width, grid, checked=False)
+        assert_invariants(puzzle, rng)
+        replay(puzzle, soln_string, rng)
+        assert puzzle.row0_invariant(0)
+
+@pytest.mark.parametrize("puzzle_height, puzzle_width", SIZES[:3])
+def test_invariants_after_set_number(puzzle_height, puzzle_width):
+    rng = random.Random(puzzle_width)
+    cells = puzzle_height * puzzle_width
+    for dummy_board in range(20):
+        #Start solved, with the blank at (0, 0), and swap tiles by hand
+        puzzle = Puzzle(puzzle_height, puzzle_width, checked=False)
+        assert_invariants(puzzle, rng)
+        for dummy_swap in range(rng.randint(1, 3)):
+            first, second = rng.sample(range(cells), 2)
+            if rng.random() < 0.5:
+                first = puzzle.get_tiles().index(0)
+                if first == second:
+                    continue
+            first_value = puzzle.get_tiles()[first]
+            second_value = puzzle.get_tiles()[second]
+            puzzle.set_number(*divmod(first, puzzle_width), second_value)
+            puzzle.set_number(*divmod(second, puzzle_width), first_value)
+            assert_invariants(puzzle, rng)
+        #Moving the blank back and forth must leave the answers alone too
+        tiles = puzzle.get_tiles()
+        row, col = divmod(tiles.index(0), puzzle_width)
+        wiggle = ("d" if row < puzzle_height - 1 else "u") + ("r" if col < puzzle_width - 1 else "l")
+        undo = "".join(INVERSE[move] for move in reversed(wiggle))
+        puzzle.update_puzzle(wiggle)
+        assert_invariants(puzzle, rng)
+        puzzle.update_puzzle(undo)
+        assert_invariants(puzzle, rng)
@@ -0,0 +1,109 @@
+"""
+Move-string compaction: every compacted string must leave the board
+exactly as the original does, including windows that touch the edges
+"""
+
+import random
+from itertools import product
+
+import pytest
+
+from fifteen_solver import moves
+from fifteen_solver.moves import (STEP, _effect, _fits, compact_moves, shortcut_table,
+                                  shorten_moves)
+from fifteen_solver.puzzle import Puzzle
+from fifteen_solver.scramble import random_grids
+
+def replayed(grid, move_string):
+    """
+    Tiles after applying a move string to a fresh copy of grid
+    """
+    puzzle = Puzzle(len(grid), len(grid[0]), grid, checked=False)
+    puzzle.update_puzzle(move_string)
+    return puzzle.get_tiles()
+
+def random_walk(rng, puzzle_height, puzzle_width, zero_row, zero_col, length):
+    """
+    Legal random moves, biased towards undoing and repeating themselves so
+    that there is something to compact
+    """
+    walk = []
+    while len(walk) < length:
+        if walk and rng.random() < 0.3:
+            direction = walk[-1] if rng.random() < 0.5 else moves.INVERSE[walk[-1]]
+        else:
+            direction = rng.choice("lrud")
+        row, col = zero_row + STEP[direction][0], zero_col + STEP[direction][1]
+        if 0 <= row < puzzle_height and 0 <= col < puzzle_width:
+            walk.append(direction)
+            zero_row, zero_col = row, col
+    return "".join(walk)
+
+@pytest.mark.parametrize("puzzle_height, puzzle_width", [(3, 3), (4, 4), (5, 7), (9, 4)])
+@pytest.mark.parametrize("window", [0, 4, 8])
+def test_compacted_solutions_replay(puzzle_height, puzzle_width, window):
+    for grid in random_grids(puzzle_height, puzzle_width, 3, window):
+        soln_string = Puzzle(puzzle_height, puzzle_width, grid, checked=False).solve_puzzle()
+        row, col = divmod([value for line in grid for value in line].index(0), puzzle_width)
+        compacted = compact_moves(soln_string, puzzle_height, puzzle_width, row, col, window)
+        assert len(compacted) <= len(soln_string)
+        assert replayed(grid, compacted) == replayed(grid, soln_string)
+        assert replayed(grid, compacted) == list(range(puzzle_height * puzzle_width))
+
+@pytest.mark.parametrize("puzzle_height, puzzle_width", [(1, 5), (2, 2), (2, 3), (3, 2), (3, 3)])
+def test_random_walks_at_the_edges(puzzle_height, puzzle_width):
+    #On boards this small nearly every window touches an edge
+    rng = random.Random(puzzle_height * 10 + puzzle_width)
+    cells = puzzle_height * puzzle_width
+    for dummy_walk in range(40):
+        tiles = list(range(cells))
+        rng.shuffle(tiles)
+        grid = [tiles[row * puzzle_width:(row + 1) * puzzle_width]
+                for row in range(puzzle_height)]
+        row, col = divmod(tiles.index(0), puzzle_width)
+        walk = random_walk(rng, puzzle_height, puzzle_width, row, col, rng.randint(1, 60))
+        for shortened in (shorten_moves(walk, puzzle_height, puzzle_width, row, col),
+                          compact_moves(walk, puzzle_height, puzzle_width, row, col, 8)):
+            assert _fits(shortened, puzzle_height, puzzle_width, row, col)
+            assert replayed(grid, shortened) == replayed(grid, walk)
+
+def test_fits_rejects_the_edges():
+    assert _fits("", 1, 1, 0, 0)
+    assert _fits("rrdd", 3, 3, 0, 0)
+    assert not _fits("l", 3, 3, 0, 0)
+    assert not _fits("u", 3, 3, 0, 2)
+    assert not _fits("rrr", 3, 3, 0, 0)
+    assert not _fits("dlddd", 3, 3, 0, 1)
+    assert _fits("dlu", 3, 3, 0, 1)
+
+def test_off_board_shortcut_is_rejected(monkeypatch):
+    #"lrlr" and "ud" have the same (empty) effect, but from the top row
+    #the shorter one leaves the board, so shorten_moves must not use it
+    table = dict(shortcut_table(4))
+    table[()] = "ud"
+    monkeypatch.setitem(moves._TABLES, 4, table)
+    shortened = shorten_moves("lrlr", 2, 3, 0, 1, window=4)
+    assert "u" not in shortened
+    assert _fits(shortened, 2, 3, 0, 1)
+    #One row down the same shortcut is on the board and is taken
+    assert shorten_moves("lrlr", 2, 3, 1, 1, window=4) == "ud"
+
+def test_shortcuts_stay_inside_their_window():
+    #Why the edges are safe in practice: no shortcut reaches a row or
+    #column its window did not, so whatever fits the board still does
+    table = shortcut_table()
+    for length in range(2, 7):
+        for window in product("lrud", repeat=length):
+            shortcut = table.get(_effect(window))
+            if shortcut is None or len(shortcut) >= length:
+                continue
+            rows, cols = set(), set()
+            row, col = 0, 0
+            for direction in window:
+                row, col = row + STEP[direction][0], col + STEP[direction][1]
+                rows.add(row)
+                cols.add(col)
+            rows.add(0)
+            cols.add(0)
+            height, width = max(rows) - min(rows) + 1, max(cols) - min(cols) + 1
+            assert _fits(shortcut, height, width, -min(rows), -min(cols))
@@ -0,0 +1,59 @@
+"""
+Pattern databases: dense placement ranks, the incremental update against
+a full rescan, and optimal solutions with the tables as heuristic
+"""
+
+import random
+
+import pytest
+
+from fifteen_solver.optimal import IDAStar, neighbour_table
+from fifteen_solver.pattern_db import (PatternDatabase, build_pattern_database,
+                                       load_pattern_database, placement_count,
+                                       placement_rank, placement_unrank)
+from fifteen_solver.scramble import random_grids
+
+@pytest.fixture(scope="module")
+def database():
+    return build_pattern_database(3, 3)
+
+@pytest.mark.parametrize("cells, slots", [(9, 1), (9, 4), (12, 3), (16, 2)])
+def test_ranks_are_dense(cells, slots):
+    count = placement_count(cells, slots)
+    seen = set()
+    for rank in range(count):
+        positions = placement_unrank(rank, cells, slots)
+        assert len(set(positions)) == slots
+        assert placement_rank(positions, cells) == rank
+        seen.add(tuple(positions))
+    assert len(seen) == count
+
+def test_update_matches_a_full_rescan(database):
+    #Backtracking the way IDA* does, without telling the database
+    rng = random.Random(3)
+    neighbours = neighbour_table(3, 3)
+    for grid in random_grids(3, 3, 10, 5):
+        tiles = [value for row in grid for value in row]
+        value = database.initial(tiles)
+        zero = tiles.index(0)
+        for dummy_step in range(200):
+            dummy_direction, other = rng.choice(neighbours[zero])
+            tile = tiles[other]
+            tiles[zero], tiles[other] = tile, 0
+            moved = database.update(tiles, value, tile, other, zero)
+            fresh = PatternDatabase(3, 3, database.get_patterns(), database._tables)
+            assert moved == fresh.initial(tiles)
+            if rng.random() < 0.3:
+                tiles[zero], tiles[other] = 0, tile
+            else:
+                value, zero = moved, other
+
+def test_optimal_lengths_match_manhattan(database, tmp_path):
+    path = tmp_path / "eight.pdb"
+    database.save(str(path))
+    loaded = load_pattern_database(str(path))
+    plain = IDAStar(3, 3)
+    tabled = IDAStar(3, 3, loaded)
+    for grid in random_grids(3, 3, 25, 11):
+        tiles = [value for row in grid for value in row]
+        assert len(tabled.solve_tiles(tiles)) == len(plain.solve_tiles(tiles))
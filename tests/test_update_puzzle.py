@@ -0,0 +1,161 @@
+"""
+update_puzzle against a naive one-move-at-a-time reference
+
+Long runs and repeated cycles are applied as bulk routes (slice
+assignments, a rewritten position table and stale row counts), so every
+test replays random move strings built from them and compares the whole
+board, current_position for every tile and rows_solved_below for every
+row with a plain list that is updated move by move.
+"""
+
+import random
+
+import pytest
+
+from fifteen_solver.moves import INVERSE, STEP
+from fifteen_solver.puzzle import ROUTE_MIN, Puzzle
+from fifteen_solver.scramble import random_grids
+
+SIZES = ((12, 40), (40, 12), (35, 35), (9, 9), (4, 4))
+
+CYCLES = tuple(side + along + along + INVERSE[side] + INVERSE[along]
+               for along in "lrud" for side in "lrud"
+               if side != along and side != INVERSE[along])
+
+class Reference:
+    """
+    Flat tile list updated one move at a time, the way the solver worked
+    before routes
+    """
+
+    def __init__(self, puzzle_height, puzzle_width, tiles):
+        self.height = puzzle_height
+        self.width = puzzle_width
+        self.tiles = list(tiles)
+        self.zero = self.tiles.index(0)
+
+    def target(self, direction):
+        """
+        Index the blank moves to, or None if that is off the board
+        """
+        row, col = divmod(self.zero, self.width)
+        row += STEP[direction][0]
+        col += STEP[direction][1]
+        if 0 <= row < self.height and 0 <= col < self.width:
+            return row * self.width + col
+        return None
+
+    def fits(self, move_string):
+        """
+        Check whether a move string stays on the board, without applying it
+        """
+        zero = self.zero
+        try:
+            for direction in move_string:
+                other = self.target(direction)
+                if other is None:
+                    return False
+                self.zero = other
+            return True
+        finally:
+            self.zero = zero
+
+    def update(self, move_string):
+        """
+        Apply moves up to the first one that leaves the board
+        Returns False if one did
+        """
+        for direction in move_string:
+            other = self.target(direction)
+            if other is None:
+                return False
+            self.tiles[self.zero] = self.tiles[other]
+            self.tiles[other] = 0
+            self.zero = other
+        return True
+
+def random_moves(reference, rng, pieces):
+    """
+    A legal move string mixing long runs, repeated cycles of every shape
+    and single moves, built against (and applied to) the reference
+    """
+    parts = []
+    for dummy_piece in range(pieces):
+        kind = rng.random()
+        if kind < 0.35:
+            piece = rng.choice("lrud") * rng.randint(1, ROUTE_MIN + 20)
+        elif kind < 0.7:
+            piece = rng.choice(CYCLES) * rng.randint(1, ROUTE_MIN // 5 + 6)
+        else:
+            piece = rng.choice("lrud")
+        #Trim anything that would leave the board
+        while piece and not reference.fits(piece):
+            piece = piece[:-1]
+        reference.update(piece)
+        parts.append(piece)
+    return "".join(parts)
+
+def assert_same(puzzle, reference):
+    """
+    Compare a puzzle with the reference: tiles, every tile's position and
+    every row's solved-below answer
+    """
+    width = reference.width
+    assert puzzle.get_tiles() == reference.tiles
+    for value, index in enumerate(sorted(range(len(reference.tiles)),
+                                         key=reference.tiles.__getitem__)):
+        assert puzzle.current_position(*divmod(value, width)) == divmod(index, width)
+    for row in range(reference.height):
+        expected = all(reference.tiles[index] == index
+                       for index in range((row + 1) * width, len(reference.tiles)))
+        assert puzzle.rows_solved_below(row) == expected
+
+@pytest.mark.parametrize("puzzle_height, puzzle_width", SIZES)
+def test_routes_match_reference(puzzle_height, puzzle_width):
+    rng = random.Random(puzzle_height * 1000 + puzzle_width)
+    for grid in random_grids(puzzle_height, puzzle_width, 6, rng.randrange(1 << 30)):
+        puzzle = Puzzle(puzzle_height, puzzle_width, grid, checked=False)
+        start = puzzle.get_tiles()
+        reference = Reference(puzzle_height, puzzle_width, start)
+        for dummy_batch in range(8):
+            puzzle.update_puzzle(random_moves(reference, rng, 40))
+            assert_same(puzzle, reference)
+
+@pytest.mark.parametrize("puzzle_height, puzzle_width", SIZES[:3])
+def test_routes_on_a_solved_board(puzzle_height, puzzle_width):
+    #Solved rows are where the stale row counts matter most
+    rng = random.Random(puzzle_width)
+    for dummy_board in range(4):
+        puzzle = Puzzle(puzzle_height, puzzle_width, checked=False)
+        reference = Reference(puzzle_height, puzzle_width, puzzle.get_tiles())
+        move_string = random_moves(reference, rng, 6)
+        puzzle.update_puzzle(move_string)
+        assert_same(puzzle, reference)
+        #Undoing the moves must bring every row back to solved
+        undo = "".join(INVERSE[direction] for direction in reversed(move_string))
+        puzzle.update_puzzle(undo)
+        reference.update(undo)
+        assert_same(puzzle, reference)
+
+@pytest.mark.parametrize("route", ["r" * (ROUTE_MIN + 5), CYCLES[3] * ROUTE_MIN])
+def test_route_off_the_board_fails_like_single_moves(route):
+    puzzle_height, puzzle_width = 20, ROUTE_MIN // 2
+    puzzle = Puzzle(puzzle_height, puzzle_width, checked=False)
+    reference = Reference(puzzle_height, puzzle_width, puzzle.get_tiles())
+    move_string = "d" * 3 + route
+    with pytest.raises(AssertionError, match="move off grid"):
+        puzzle.update_puzzle(move_string)
+    assert not reference.update(move_string)
+    assert_same(puzzle, reference)
+
+def test_solutions_replay_on_a_large_board():
+    grid = next(random_grids(40, 40, 1, 7))
+    puzzle = Puzzle(40, 40, grid, checked=False)
+    soln_string = puzzle.solve_puzzle()
+    assert puzzle.row0_invariant(0)
+    replayed = Puzzle(40, 40, grid, checked=False)
+    replayed.update_puzzle(soln_string)
+    assert replayed.get_tiles() == puzzle.get_tiles()
+    reference = Reference(40, 40, [value for row in grid for value in row])
+    assert reference.update(soln_string)
+    assert_same(replayed, reference)
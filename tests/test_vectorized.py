@@ -0,0 +1,26 @@
+"""
+NumPy batch engine; skipped where NumPy (an optional dependency) is missing
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from fifteen_solver.puzzle import Puzzle
+from fifteen_solver.scramble import random_grids
+from fifteen_solver.vectorized import CODES, INVALID, PAD, encode_moves, verify_solutions
+
+def test_non_moves_encode_as_invalid():
+    codes = encode_moves(["lréd", "u→", "x"])
+    assert codes.tolist() == [[CODES["l"], CODES["r"], INVALID, CODES["d"]],
+                              [CODES["u"], INVALID, PAD, PAD],
+                              [INVALID, PAD, PAD, PAD]]
+
+def test_verify_solutions():
+    grids = list(random_grids(4, 5, 6, 2))
+    solutions = [Puzzle(4, 5, grid, checked=False).solve_puzzle() for grid in grids]
+    #A non-ASCII move and a truncated solution must fail, not raise
+    solutions[1] = solutions[1][:-1] + "ü"
+    solutions[2] = solutions[2][:-1]
+    assert verify_solutions(4, 5, grids, solutions).tolist() == [True, False, False,
+                                                                 True, True, True]